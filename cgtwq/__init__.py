@@ -9,13 +9,15 @@ from .client import DesktopClient
 from .database import Database
 from .exceptions import (AccountError, AccountNotFoundError,
                          CGTeamWorkException, IDError, LoginError,
-                         PasswordError, PermissionError, PrefixError,
-                         SignError)
+                         PartialWriteError, PasswordError, PermissionError,
+                         PrefixError, SignError)
 from .filter import Field, Filter, FilterList
 from .message import Message
+from .mirror import ModuleMirror
 from .module import Module
 from .public_module import ACCOUNT, PROJECT
 from .resultset import ResultSet
 from .selection import Entry, Selection
 from .status import get_all as get_all_status
+from .unitofwork import UnitOfWork
 from .util import current_account, current_account_id, update_setting
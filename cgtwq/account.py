@@ -4,10 +4,49 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import threading
+
 from . import server
-from .exceptions import AccountNotFoundError, PasswordError
+from .exceptions import AccountNotFoundError, LoginError, PasswordError
 from .model import AccountInfo
 
+# Identity never changes for a token,
+# token as key, dict of cached values as value.
+_IDENTITY_CACHE = {}
+_IDENTITY_LOCK = threading.Lock()
+
+
+def _cached(token, key, func):
+    if not token:
+        return func()
+    with _IDENTITY_LOCK:
+        identity = _IDENTITY_CACHE.get(token, {})
+        if key in identity:
+            return identity[key]
+    try:
+        ret = func()
+    except LoginError:
+        invalidate(token)
+        raise
+    with _IDENTITY_LOCK:
+        _IDENTITY_CACHE.setdefault(token, {})[key] = ret
+    return ret
+
+
+def invalidate(token=None):
+    """Remove cached identity of token.
+
+    Args:
+        token (str, optional): Defaults to None.
+            Server token, None means all token.
+    """
+
+    with _IDENTITY_LOCK:
+        if token is None:
+            _IDENTITY_CACHE.clear()
+        else:
+            _IDENTITY_CACHE.pop(token, None)
+
 
 def get_account(token):
     """Get account from token.
@@ -19,7 +58,8 @@ def get_account(token):
         str: Account name.
     """
 
-    return server.call("c_token", "get_account", token=token)
+    return _cached(token, 'account',
+                   lambda: server.call("c_token", "get_account", token=token))
 
 
 def get_account_id(token):
@@ -31,7 +71,24 @@ def get_account_id(token):
     Returns:
         str: Account id.
     """
-    return server.call("c_token", "get_account_id", token=token)
+
+    return _cached(token, 'account_id',
+                   lambda: server.call("c_token", "get_account_id", token=token))
+
+
+def get_account_info(token):
+    """Get account information from a token created by `login`.
+
+    Args:
+        token (str): Server token
+
+    Returns:
+        AccountInfo or None: Account information,
+            None if token is not created by `login` in this process.
+    """
+
+    with _IDENTITY_LOCK:
+        return _IDENTITY_CACHE.get(token, {}).get('info')
 
 
 def login(account, password):
@@ -65,7 +122,15 @@ def login(account, password):
         raise
     assert isinstance(resp, dict), type(resp)
     _ = [resp.setdefault(i, None) for i in AccountInfo._fields]
-    return AccountInfo(**resp)
+    ret = AccountInfo(**resp)
+    if ret.token:
+        with _IDENTITY_LOCK:
+            _IDENTITY_CACHE[ret.token] = {
+                'account': ret.account,
+                'account_id': ret.account_id,
+                'info': ret,
+            }
+    return ret
 
 
 def get_online_account_id(token=None):
@@ -0,0 +1,320 @@
+# -*- coding=UTF-8 -*-
+"""Optional read-through cache for server queries.
+
+Disabled by default, use `enable` to turn it on.
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import logging
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+import six
+
+from . import codec, entity_cache
+
+LOGGER = logging.getLogger(__name__)
+
+CacheStats = namedtuple('CacheStats', ('hits', 'misses', 'size'))
+
+# (controller, method) that result can be cached.
+READ_METHODS = frozenset([
+    ('c_orm', 'get_in_id'),
+    ('c_orm', 'get_with_filter'),
+    ('c_field', 'get_in_module'),
+    ('c_pipeline', 'get_with_filter'),
+    ('c_status', 'get_all'),
+])
+
+# (controller, method) that modify module data.
+WRITE_METHODS = frozenset([
+    ('c_orm', 'set_in_id'),
+    ('c_orm', 'del_in_id'),
+    ('c_work_flow', 'python_update_flow'),
+    ('c_work_flow', 'submit'),
+    ('c_work_flow', 'assign_to'),
+])
+
+# Controllers that read module data, other controllers read meta data.
+DATA_CONTROLLERS = frozenset(['c_orm'])
+
+_ID_KEYS = ('id_array', 'task_id_array', 'task_id', 'id')
+
+_Entry = namedtuple('_Entry', ('value', 'expire',
+                               'database', 'module', 'id_set', 'is_data'))
+
+
+class QueryCache(object):
+    """Thread-safe query cache with TTL and LRU eviction.  """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        """
+        Args:
+            maxsize (int, optional): Defaults to 1024. Maximum entry count.
+            ttl (float, optional): Defaults to 60. Seconds before entry expire.
+        """
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        # (database, module) as key, invalidation count as value,
+        # module None means whole database.
+        self._generations = {}
+        # (database, module) as key, running write count as value.
+        self._writing = {}
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        """Get cached value.
+
+        Args:
+            key (text_type): Cache key.
+
+        Raises:
+            KeyError: When no valid cache for the key.
+
+        Returns:
+            Cached value, do not modify it.
+        """
+
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is None or entry.expire < time.time():
+                self.misses += 1
+                raise KeyError(key)
+            # Re-insert to mark as recently used.
+            self._data[key] = entry
+            self.hits += 1
+            return entry.value
+
+    def _generation(self, database, module):
+        return (self._generations.get((database, None), 0),
+                self._generations.get((database, module), 0))
+
+    def generation(self, database, module=None):
+        """Invalidation generation of a module.
+
+        Take it before a server request and pass it to `set`,
+        so result of a request that overlapped a write is not cached.
+
+        Args:
+            database (text_type): Database name.
+            module (text_type, optional): Defaults to None. Module name.
+
+        Returns:
+            tuple: Generation.
+        """
+
+        with self._lock:
+            return self._generation(database, module)
+
+    def begin_write(self, database, module=None):
+        """Mark a write to the module is running.
+
+        Args:
+            database (text_type): Database name.
+            module (text_type, optional): Defaults to None.
+                Module name, None means all module.
+        """
+
+        key = (database, module)
+        with self._lock:
+            self._writing[key] = self._writing.get(key, 0) + 1
+
+    def end_write(self, database, module=None):
+        """Mark a write to the module finished, see `begin_write`.  """
+
+        key = (database, module)
+        with self._lock:
+            count = self._writing.pop(key) - 1
+            if count:
+                self._writing[key] = count
+
+    def set(self, key, value, database=None, module=None,
+            id_list=None, is_data=True, generation=None):
+        """Set cached value.
+
+        Args:
+            key (text_type): Cache key.
+            value: Value to cache.
+            database (text_type, optional): Related database.
+            module (text_type, optional): Related module.
+            id_list (Iterable, optional): Related item id,
+                None means value may related to any item in the module.
+            is_data (bool, optional): Defaults to True.
+                Whether value should be invalidated on module data change.
+            generation (tuple, optional): Defaults to None.
+                Result of `generation` before the request,
+                value is discarded if module changed or is changing since then.
+        """
+
+        entry = _Entry(value, time.time() + self.ttl,
+                       database, module,
+                       None if id_list is None else frozenset(id_list),
+                       is_data)
+        with self._lock:
+            if is_data and generation is not None and (
+                    generation != self._generation(database, module)
+                    or (database, None) in self._writing
+                    or (database, module) in self._writing):
+                LOGGER.debug('Discard changed query result: %s', key)
+                return
+            self._data.pop(key, None)
+            self._data[key] = entry
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, database, module=None, id_list=None):
+        """Remove data cache related to the items.
+
+        Args:
+            database (text_type): Database name.
+            module (text_type, optional): Defaults to None.
+                Module name, None means all module.
+            id_list (Iterable, optional): Defaults to None.
+                Changed item id, None means all item.
+        """
+
+        id_set = None if id_list is None else frozenset(id_list)
+        with self._lock:
+            key = (database, module)
+            self._generations[key] = self._generations.get(key, 0) + 1
+            for key, entry in list(self._data.items()):
+                if (entry.is_data
+                        and entry.database == database
+                        and (module is None or entry.module == module)
+                        and (id_set is None
+                             or entry.id_set is None
+                             or entry.id_set & id_set)):
+                    del self._data[key]
+
+    def clear(self):
+        """Remove all cached data and reset statistics.  """
+
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """Cache statistics.
+
+        Returns:
+            CacheStats: namedtuple for ('hits', 'misses', 'size').
+        """
+
+        with self._lock:
+            return CacheStats(self.hits, self.misses, len(self._data))
+
+
+CACHE = None
+
+
+def enable(maxsize=1024, ttl=60):
+    """Enable query cache.
+
+    Args:
+        maxsize (int, optional): Defaults to 1024. Maximum entry count.
+        ttl (float, optional): Defaults to 60. Seconds before entry expire.
+
+    Returns:
+        QueryCache: Enabled cache.
+    """
+
+    global CACHE  # pylint: disable=global-statement
+    CACHE = QueryCache(maxsize, ttl)
+    return CACHE
+
+
+def disable():
+    """Disable query cache.  """
+
+    global CACHE  # pylint: disable=global-statement
+    CACHE = None
+
+
+def stats():
+    """Statistics of current query cache.
+
+    Returns:
+        CacheStats: namedtuple for ('hits', 'misses', 'size').
+    """
+
+    if CACHE is None:
+        return CacheStats(0, 0, 0)
+    return CACHE.stats()
+
+
+def invalidate(database, module=None, id_list=None):
+    """Remove cache related to changed items, include `entity_cache`.
+
+    Args:
+        database (text_type): Database name.
+        module (text_type, optional): Defaults to None.
+            Module name, None means all module.
+        id_list (Iterable, optional): Defaults to None.
+            Changed item id, None means all item.
+    """
+
+    for i in (CACHE, entity_cache.CACHE):
+        if i is not None:
+            i.invalidate(database, module, id_list)
+
+
+def _get_id_list(kwargs):
+    for i in _ID_KEYS:
+        if i in kwargs:
+            value = kwargs[i]
+            return [value] if isinstance(value, six.string_types) else value
+    return None
+
+
+def cached_call(func, controller, method, **kwargs):
+    """Call server method through the query cache.
+
+    Args:
+        func (callable): Server call function.
+        controller (text_type): Server defined controller name.
+        method (text_type): Server defined method name.
+        **kwargs: Keyword arguments for `func`.
+
+    Returns:
+        Server execution result.
+    """
+
+    key_method = (controller, method)
+    database, module = kwargs.get('db'), kwargs.get('module')
+    query_cache = CACHE
+    if key_method in WRITE_METHODS:
+        if query_cache is not None:
+            query_cache.begin_write(database, module)
+        try:
+            return func(controller, method, **kwargs)
+        finally:
+            invalidate(database, module, _get_id_list(kwargs))
+            if query_cache is not None:
+                query_cache.end_write(database, module)
+
+    if query_cache is None or key_method not in READ_METHODS:
+        return func(controller, method, **kwargs)
+
+    key = codec.dumps([controller, method, kwargs], sort_keys=True)
+    try:
+        return query_cache.get(key)
+    except KeyError:
+        pass
+    generation = query_cache.generation(database, module)
+    ret = func(controller, method, **kwargs)
+    is_data = controller in DATA_CONTROLLERS
+    query_cache.set(key, ret, database, module,
+                    _get_id_list(kwargs) if is_data else None,
+                    is_data, generation)
+    return ret
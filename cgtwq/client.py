@@ -3,18 +3,19 @@
 
 from __future__ import absolute_import, print_function, unicode_literals
 
-import json
 import logging
 import os
 import socket
+import threading
 import time
 from collections import namedtuple
 from functools import partial
 from subprocess import Popen
 
 from six import text_type
-from websocket import create_connection
+from websocket import WebSocketException, create_connection
 
+from . import codec, filetools
 from .exceptions import IDError
 
 DesktopClientStatus = namedtuple(
@@ -43,6 +44,18 @@ class DesktopClient(object):
     qt_url = 'ws://127.0.0.1:64998'
     time_out = 1
     cache = {}
+    # Reuse one websocket connection for all calls when enabled.
+    keep_alive = False
+    _connection = None
+    _connection_lock = threading.RLock()
+    # Seconds an expired value can still be returned
+    # while refreshing in background, 0 to disable.
+    stale_age = 0
+    # Json file to share cached values between processes, None to disable.
+    # It holds credentials(e.g. token), so it is only readable by owner.
+    shared_cache_path = None
+    _cache_lock = threading.Lock()
+    _key_locks = {}
 
     def __init__(self):
         self.start()
@@ -160,11 +173,111 @@ see: https://github.com/websocket-client/websocket-client/issues/404
 
     @classmethod
     def _cached(cls, key, func, max_age):
-        now = time.time()
-        if (key not in cls.cache
-                or cls.cache[key][1] + max_age < now):
-            cls.cache[key] = (func(), now)
-        return cls.cache[key][0]
+        started = time.time()
+        min_time = started - max_age
+        entry = cls._lookup(key, min_time)
+        if entry is not None:
+            return entry[0]
+
+        entry = cls.cache.get(key)
+        if (entry is not None
+                and max_age >= 0
+                and entry[1] >= min_time - cls.stale_age):
+            cls._refresh_in_background(key, func)
+            return entry[0]
+
+        with cls._key_lock(key):
+            # Accept value refreshed by other thread while waiting,
+            # even when force refresh by negative `max_age`.
+            entry = cls._lookup(key, min(min_time, started))
+            if entry is None:
+                entry = cls._update_cache(key, func)
+        return entry[0]
+
+    @classmethod
+    def _key_lock(cls, key):
+        with cls._cache_lock:
+            return cls._key_locks.setdefault(key, threading.Lock())
+
+    @classmethod
+    def _lookup(cls, key, min_time):
+        entry = cls.cache.get(key)
+        if entry is not None and entry[1] >= min_time:
+            return entry
+        entry = cls._load_shared(key)
+        if entry is not None and entry[1] >= min_time:
+            cls.cache[key] = entry
+            return entry
+        return None
+
+    @classmethod
+    def _update_cache(cls, key, func):
+        entry = (func(), time.time())
+        cls.cache[key] = entry
+        cls._save_shared(key, entry)
+        return entry
+
+    @classmethod
+    def _refresh_in_background(cls, key, func):
+        lock = cls._key_lock(key)
+        if not lock.acquire(False):
+            # Already refreshing.
+            return
+
+        def _run():
+            try:
+                cls._update_cache(key, func)
+            except Exception:  # pylint: disable=broad-except
+                LOGGER.debug('Background refresh failed: %s', key,
+                             exc_info=True)
+            finally:
+                lock.release()
+
+        thread = threading.Thread(target=_run, name='cgtwq-refresh-' + key)
+        thread.daemon = True
+        thread.start()
+
+    @classmethod
+    def _load_shared_cache(cls):
+        path = cls.shared_cache_path
+        if not path or not os.path.exists(path):
+            return {}
+        try:
+            with open(path, 'rb') as f:
+                ret = codec.loads(f.read())
+        except (IOError, OSError, ValueError):
+            LOGGER.debug('Can not read shared cache: %s', path, exc_info=True)
+            return {}
+        return ret if isinstance(ret, dict) else {}
+
+    @classmethod
+    def _load_shared(cls, key):
+        value = cls._load_shared_cache().get(key)
+        if not isinstance(value, list) or len(value) != 2:
+            return None
+        return tuple(value)
+
+    @classmethod
+    def _save_shared(cls, key, entry):
+        path = cls.shared_cache_path
+        if not path:
+            return
+        data = cls._load_shared_cache()
+        data[key] = entry
+        # Write to temporary file then rename,
+        # so other process never reads a partial file.
+        tmp_path = '{}.{}.{}.tmp'.format(
+            path, os.getpid(), threading.current_thread().ident)
+        try:
+            filetools.makedirs(os.path.dirname(path))
+            # Create with owner only permission, token is in the data.
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                         0o600)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(codec.dumps(data).encode('utf-8'))
+            filetools.replace(tmp_path, path)
+        except (IOError, OSError):
+            LOGGER.debug('Can not write shared cache: %s', path, exc_info=True)
 
     @classmethod
     def token(cls, max_age=2):
@@ -281,20 +394,78 @@ see: https://github.com/websocket-client/websocket-client/issues/404
         _kwargs['sign'] = controller
         _kwargs['method'] = method
 
-        payload = json.dumps(_kwargs, indent=4, sort_keys=True)
-        conn = create_connection(cls.url, cls.time_out)
+        payload = codec.dumps(_kwargs, indent=4, sort_keys=True)
+        recv = cls._request(payload)
+        ret = codec.loads(recv)
+        ret = ret['data']
+        try:
+            ret = codec.loads(ret)
+        except (TypeError, ValueError):
+            pass
+        return ret
+
+    @classmethod
+    def _request(cls, payload):
+        if not cls.keep_alive:
+            conn = create_connection(cls.url, cls.time_out)
+            try:
+                return cls._exchange(conn, payload)
+            finally:
+                conn.close()
+
+        # Client protocol has no request id,
+        # so response is matched to request by serializing calls.
+        with cls._connection_lock:
+            conn = cls._connection
+            if conn is not None:
+                try:
+                    conn.send(payload)
+                except (socket.error, WebSocketException):
+                    LOGGER.debug('Connection lost, reconnect: %s', cls.url)
+                    cls._close()
+                else:
+                    LOGGER.debug('SEND: %s', payload)
+                    return cls._receive(conn)
+
+            conn = create_connection(cls.url, cls.time_out)
+            cls._connection = conn
+            try:
+                return cls._exchange(conn, payload)
+            except BaseException:
+                cls._close()
+                raise
+
+    @classmethod
+    def _exchange(cls, conn, payload):
+        conn.send(payload)
+        LOGGER.debug('SEND: %s', payload)
+        return cls._receive(conn)
 
+    @classmethod
+    def _receive(cls, conn):
         try:
-            conn.send(payload)
-            LOGGER.debug('SEND: %s', payload)
             recv = conn.recv()
-            LOGGER.debug('RECV: %s', recv)
-            ret = json.loads(recv)
-            ret = ret['data']
-            try:
-                ret = json.loads(ret)
-            except (TypeError, ValueError):
-                pass
-            return ret
-        finally:
+        except BaseException:
+            # Unread response will mismatch next request.
+            if conn is cls._connection:
+                cls._close()
+            raise
+        LOGGER.debug('RECV: %s', recv)
+        return recv
+
+    @classmethod
+    def _close(cls):
+        conn, cls._connection = cls._connection, None
+        if conn is None:
+            return
+        try:
             conn.close()
+        except (socket.error, WebSocketException):
+            LOGGER.debug('Error when close connection.', exc_info=True)
+
+    @classmethod
+    def close(cls):
+        """Close kept alive connection, next call will reconnect.  """
+
+        with cls._connection_lock:
+            cls._close()
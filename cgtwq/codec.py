@@ -0,0 +1,286 @@
+# -*- coding=UTF-8 -*-
+"""Json codec, use fastest installed backend.
+
+Backends are tried in order: `orjson`, `ujson`, `rapidjson`,
+then fallback to stdlib `json`.
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import importlib
+import json
+import logging
+from collections import namedtuple
+
+import six
+
+from .resultset import ResultSet
+
+LOGGER = logging.getLogger(__name__)
+
+Backend = namedtuple('Backend', ('name', 'dumps', 'loads'))
+
+BACKEND_NAMES = ('orjson', 'ujson', 'rapidjson', 'json')
+
+
+def _default(obj):
+    # Tuple subclasses(e.g. `Selection`, namedtuple)
+    # are not supported by some backends.
+    if isinstance(obj, tuple):
+        return list(obj)
+    if isinstance(obj, ResultSet):
+        return obj.to_list()
+    raise TypeError('Type is not JSON serializable.', type(obj))
+
+
+def _create_orjson(module):
+    def _dumps(obj, sort_keys=False):
+        option = module.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= module.OPT_SORT_KEYS
+        return module.dumps(obj, default=_default, option=option).decode('utf-8')
+
+    return Backend('orjson', _dumps, module.loads)
+
+
+def _create_ujson(module):
+    # `default` is supported since ujson 5.
+    try:
+        module.dumps([], default=_default)
+        kwargs = {'default': _default}
+    except TypeError:
+        kwargs = {}
+
+    def _dumps(obj, sort_keys=False):
+        return module.dumps(obj, sort_keys=sort_keys,
+                            escape_forward_slashes=False,
+                            ensure_ascii=False, **kwargs)
+
+    return Backend('ujson', _dumps, module.loads)
+
+
+def _create_rapidjson(module):
+    def _dumps(obj, sort_keys=False):
+        return module.dumps(obj, sort_keys=sort_keys,
+                            default=_default, ensure_ascii=False)
+
+    return Backend('rapidjson', _dumps, module.loads)
+
+
+def _create_json(module):
+    def _dumps(obj, sort_keys=False):
+        return module.dumps(obj, sort_keys=sort_keys, default=_default)
+
+    return Backend('json', _dumps, module.loads)
+
+
+_FACTORIES = {
+    'orjson': _create_orjson,
+    'ujson': _create_ujson,
+    'rapidjson': _create_rapidjson,
+    'json': _create_json,
+}
+
+BACKEND = _create_json(json)
+
+
+class _StreamReader(object):
+    """Read json values from text chunks.  """
+
+    _whitespace = ' \t\n\r'
+    _delimiters = ',:]}'
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._index = 0
+        self._is_end = False
+
+    def _fill(self):
+        if self._is_end:
+            return False
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self._is_end = True
+            return False
+        self._buffer = self._buffer[self._index:] + chunk
+        self._index = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character, empty string on stream end.  """
+
+        while True:
+            buffer_ = self._buffer
+            index = self._index
+            length = len(buffer_)
+            while index < length and buffer_[index] in self._whitespace:
+                index += 1
+            self._index = index
+            if index < length:
+                return buffer_[index]
+            if not self._fill():
+                return ''
+
+    def next_char(self):
+        """Consume next non-whitespace character.  """
+
+        ret = self.peek()
+        if not ret:
+            raise ValueError('Unexpected end of json stream.')
+        self._index += 1
+        return ret
+
+    def expect(self, char):
+        """Consume next non-whitespace character, it must be `char`.  """
+
+        ret = self.next_char()
+        if ret != char:
+            raise ValueError(
+                'Expecting {!r} in json stream, got {!r}.'.format(char, ret))
+
+    def value(self):
+        """Consume next json value.  """
+
+        self.peek()
+        while True:
+            try:
+                ret, end = self._decoder.raw_decode(self._buffer, self._index)
+            except ValueError:
+                if self._fill():
+                    continue
+                raise
+            # Number may continue in next chunk, e.g. `1.` + `5`,
+            # so value must be followed by a delimiter.
+            buffer_ = self._buffer
+            index = end
+            length = len(buffer_)
+            while index < length and buffer_[index] in self._whitespace:
+                index += 1
+            if ((index == length or buffer_[index] not in self._delimiters)
+                    and self._fill()):
+                continue
+            self._index = end
+            return ret
+
+
+def iter_items(chunks, key, header):
+    """Iterate array items of a top-level object key from json text chunks.
+
+    Items are decoded as soon as they are complete,
+    so whole json text never need to be in memory.
+
+    Args:
+        chunks (Iterable[six.text_type]): Json text chunks.
+        key (six.text_type): Key of array in the top-level object.
+        header (dict): Other top-level keys will be saved in it,
+            when iteration finished.
+
+    Raises:
+        ValueError: When data is not valid json.
+
+    Yields:
+        Array item.
+    """
+
+    reader = _StreamReader(chunks)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        name = reader.value()
+        reader.expect(':')
+        if name == key and reader.peek() == '[':
+            reader.expect('[')
+            if reader.peek() == ']':
+                reader.expect(']')
+            else:
+                while True:
+                    yield reader.value()
+                    char = reader.next_char()
+                    if char == ']':
+                        break
+                    elif char != ',':
+                        raise ValueError(
+                            'Expecting "," or "]" in json stream.', char)
+        else:
+            header[name] = reader.value()
+        char = reader.next_char()
+        if char == '}':
+            break
+        elif char != ',':
+            raise ValueError('Expecting "," or "}" in json stream.', char)
+
+
+def use(name=None):
+    """Select json backend.
+
+    Args:
+        name (text_type, optional): Defaults to None.
+            One of `BACKEND_NAMES`, if `name` is None,
+            will use first installed one.
+
+    Raises:
+        ImportError: When specified backend not installed.
+
+    Returns:
+        Backend: Selected backend.
+    """
+
+    global BACKEND  # pylint: disable=global-statement
+
+    for i in ((name,) if name else BACKEND_NAMES):
+        try:
+            module = importlib.import_module(i)
+        except ImportError:
+            if name:
+                raise
+            continue
+        BACKEND = _FACTORIES[i](module)
+        break
+    LOGGER.debug('Using json backend: %s', BACKEND.name)
+    return BACKEND
+
+
+def dumps(obj, indent=None, sort_keys=False):
+    """Serialize object to json text.
+
+    Args:
+        obj: Object to serialize.
+        indent (int, optional): Defaults to None.
+            If `indent` is not None, will always use stdlib `json`
+            to keep exactly same output format.
+        sort_keys (bool, optional): Defaults to False. Sort dictionary keys.
+
+    Returns:
+        six.text_type: Json text.
+    """
+
+    if indent is not None:
+        return json.dumps(obj, indent=indent, sort_keys=sort_keys)
+    return BACKEND.dumps(obj, sort_keys=sort_keys)
+
+
+def loads(data):
+    """Deserialize json text or utf-8 encoded bytes.
+
+    Args:
+        data (six.text_type, six.binary_type): Json data.
+
+    Raises:
+        TypeError: When `data` is not text or bytes.
+        ValueError: When `data` is not valid json.
+
+    Returns:
+        Deserialized object.
+    """
+
+    if not isinstance(data, (six.text_type, six.binary_type, bytearray)):
+        raise TypeError('Can not load json from such type.', type(data))
+    return BACKEND.loads(data)
+
+
+use()
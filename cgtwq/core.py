@@ -9,7 +9,7 @@ from .filter import FilterList
 class ControllerGetterMixin(object):
     """Mixin for controller getter.  """
 
-    def _get_model(self, controller, method, model, filters):
+    def _get_model(self, controller, method, model, filters, stream=False):
         """Get infomation from controller with data model.
 
         Args:
@@ -18,14 +18,20 @@ class ControllerGetterMixin(object):
             method (str): Server defined method name.
             filters (FilterList): Filters.
             model (namedtuple): Data model.
+            stream (bool, optional): Defaults to False.
+                If `stream` is True, will return a generator that parse
+                response incrementally.
 
         Returns:
-            tuple[model]: Result
+            tuple[model] or Iterator[model]: Result
         """
 
         fields = getattr(model, 'fields', model._fields)
-        resp = self.call(
-            controller, method,
-            field_array=fields,
-            filter_array=FilterList(filters))
-        return tuple(model(*i) for i in resp)
+        make = getattr(model, 'from_row', None) or (lambda i: model(*i))
+        kwargs = dict(field_array=fields,
+                      filter_array=FilterList(filters))
+        if stream:
+            return (make(i)
+                    for i in self.iter_call(controller, method, **kwargs))
+        resp = self.call(controller, method, **kwargs)
+        return tuple(make(i) for i in resp)
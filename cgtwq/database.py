@@ -5,7 +5,7 @@ from __future__ import (absolute_import, division, print_function,
 
 import logging
 
-from . import server
+from . import cache, server
 from .core import ControllerGetterMixin
 from .filter import Field, Filter, FilterList
 from .model import FieldInfo, FileBoxCategoryInfo, ModuleInfo, PipelineInfo
@@ -44,7 +44,13 @@ class Database(ControllerGetterMixin):
         """Call on this database.   """
 
         kwargs.setdefault('token', self.token)
-        return server.call(*args, db=self.name, **kwargs)
+        return cache.cached_call(server.call, *args, db=self.name, **kwargs)
+
+    def iter_call(self, *args, **kwargs):
+        """Streaming call on this database, for methods that return a list.  """
+
+        kwargs.setdefault('token', self.token)
+        return server.iter_call(*args, db=self.name, **kwargs)
 
     def get_fileboxes(self, filters=None, id_=None):
         """Get fileboxes in this database.
@@ -0,0 +1,357 @@
+# -*- coding=UTF-8 -*-
+"""Download server files with a bounded local cache.
+
+Files are stored under user cache directory keyed by server path,
+cached file is revalidated with `ETag`/`Last-Modified`,
+so unchanged file is not transferred again.
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+
+from . import codec, filetools, parallel
+from .server import setting
+from .server.http import SESSION
+
+LOGGER = logging.getLogger(__name__)
+
+
+def default_path():
+    """Default cache directory in user cache directory.
+
+    Returns:
+        text_type: Cache directory.
+    """
+
+    return filetools.cache_dir('download')
+
+
+class DownloadCache(object):
+    """Thread-safe on-disk cache of downloaded server files.  """
+
+    def __init__(self, path=None, max_size=512 * 1024 * 1024, max_age=60):
+        """
+        Args:
+            path (text_type, optional): Defaults to None.
+                Cache directory, if `path` is None, will use `default_path()`.
+            max_size (int, optional): Defaults to 512MiB.
+                Maximum total bytes, least recently used files are
+                removed when exceeded.
+            max_age (float, optional): Defaults to 60.
+                Seconds a cached file is used without revalidation.
+        """
+
+        self.path = path or default_path()
+        self.max_size = max_size
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # Url as key, (lock, user count) as value,
+        # removed when no fetch use it.
+        self._key_locks = {}
+        # Filename as key, user count as value,
+        # pinned files are not evicted.
+        self._pinned = {}
+        # Total bytes, None means unknown.
+        self._size = None
+
+    def _filename(self, pathname):
+        key = hashlib.sha1(pathname.encode('utf-8')).hexdigest()
+        return os.path.join(self.path, key[:2], key)
+
+    def _acquire_key_lock(self, url):
+        with self._lock:
+            lock, count = self._key_locks.get(url, (None, 0))
+            lock = lock or threading.Lock()
+            self._key_locks[url] = (lock, count + 1)
+        lock.acquire()
+        return lock
+
+    def _release_key_lock(self, url, lock):
+        lock.release()
+        with self._lock:
+            _, count = self._key_locks[url]
+            if count > 1:
+                self._key_locks[url] = (lock, count - 1)
+            else:
+                del self._key_locks[url]
+
+    def _pin(self, filenames):
+        with self._lock:
+            for i in filenames:
+                self._pinned[i] = self._pinned.get(i, 0) + 1
+
+    def _unpin(self, filenames):
+        with self._lock:
+            for i in filenames:
+                count = self._pinned.pop(i) - 1
+                if count:
+                    self._pinned[i] = count
+
+    @staticmethod
+    def _url(pathname, ip):
+        ip = ip or setting.SERVER_IP
+        return 'http://{}/{}'.format(ip, pathname.lstrip('\\/'))
+
+    @staticmethod
+    def _load_meta(filename):
+        try:
+            with open(filename + '.json', 'rb') as f:
+                return codec.loads(f.read())
+        except (IOError, OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _save_meta(filename, meta):
+        with open(filename + '.json', 'wb') as f:
+            f.write(codec.dumps(meta).encode('utf-8'))
+
+    def fetch(self, pathname, token=None, ip=None):
+        """Get local file of server path, download when needed.
+
+        Returned file is never evicted by this call,
+        even if it is larger than `max_size`.
+
+        Args:
+            pathname (text_type): Server path, e.g. `ImageInfo.max`.
+            token (text_type, optional): Defaults to None.
+                User token, if `token` is None, will use token from setting.
+            ip (text_type, optional): Defaults to None.
+                Server ip, if `ip` is None, will use ip from setting.
+
+        Raises:
+            requests.HTTPError: When server responded error.
+
+        Returns:
+            text_type: Local filename, do not modify it.
+        """
+
+        url = self._url(pathname, ip)
+        filename = self._filename(url)
+        self._pin([filename])
+        try:
+            self._fetch(url, filename, token)
+            self._evict_if_needed()
+        finally:
+            self._unpin([filename])
+        return filename
+
+    def _fetch(self, url, filename, token):
+        lock = self._acquire_key_lock(url)
+        try:
+            return self._fetch_locked(url, filename, token)
+        finally:
+            self._release_key_lock(url, lock)
+
+    def _fetch_locked(self, url, filename, token):
+        token = token or setting.DEFAULT_TOKEN
+        meta = self._load_meta(filename)
+        if meta is not None and not os.path.exists(filename):
+            meta = None
+        if (meta is not None
+                and meta['checked_at'] + self.max_age > time.time()):
+            _touch(filename)
+            return filename
+
+        headers = {}
+        if meta is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        resp = SESSION.get(url, headers=headers,
+                           cookies={'token': token}, stream=True)
+        try:
+            if meta is not None and resp.status_code == 304:
+                LOGGER.debug('Not modified: %s', url)
+            else:
+                resp.raise_for_status()
+                size = self._save(resp, filename)
+                with self._lock:
+                    if self._size is not None:
+                        self._size += size
+                meta = {'url': url,
+                        'etag': resp.headers.get('ETag'),
+                        'last_modified': resp.headers.get('Last-Modified')}
+        finally:
+            resp.close()
+        meta['checked_at'] = time.time()
+        self._save_meta(filename, meta)
+        _touch(filename)
+        return filename
+
+    def _evict_if_needed(self):
+        if self._size is None or self._size > self.max_size:
+            self.evict()
+
+    def _save(self, resp, filename):
+        filetools.makedirs(os.path.dirname(filename))
+        # Write to temporary file then rename,
+        # so reader never sees a partial file.
+        tmp_filename = '{}.{}.tmp'.format(filename, uuid.uuid4().hex)
+        try:
+            size = 0
+            with open(tmp_filename, 'wb') as f:
+                for chunk in resp.iter_content(setting.STREAM_CHUNK_SIZE):
+                    f.write(chunk)
+                    size += len(chunk)
+            filetools.replace(tmp_filename, filename)
+        finally:
+            if os.path.exists(tmp_filename):
+                os.remove(tmp_filename)
+        LOGGER.debug('Downloaded: %s: %d bytes', resp.url, size)
+        return size
+
+    def fetch_many(self, pathnames, token=None, ip=None, workers=None):
+        """Fetch multiple server path concurrently.
+
+        Files of the batch are not evicted until all finished,
+        so every returned filename exists.
+
+        Args:
+            pathnames (Iterable[text_type]): Server paths.
+            token (text_type, optional): Defaults to None. User token.
+            ip (text_type, optional): Defaults to None. Server ip.
+            workers (int, optional): Defaults to None.
+                Maximum concurrent downloads.
+
+        Returns:
+            parallel.BatchResult: Server path as key, local filename as value.
+        """
+
+        urls = {i: self._url(i, ip) for i in set(pathnames)}
+        filenames = [self._filename(i) for i in urls.values()]
+        self._pin(filenames)
+        try:
+            ret = parallel.settle(
+                lambda i: self._fetch(urls[i], self._filename(urls[i]), token),
+                urls, workers)
+            self._evict_if_needed()
+        finally:
+            self._unpin(filenames)
+        return ret
+
+    def files(self):
+        """Cached files.
+
+        Returns:
+            list[tuple]: (filename, size, last used time),
+                least recently used first.
+        """
+
+        ret = []
+        if not os.path.isdir(self.path):
+            return ret
+        for dirpath, _, filenames in os.walk(self.path):
+            for i in filenames:
+                if i.endswith(('.json', '.tmp')):
+                    continue
+                filename = os.path.join(dirpath, i)
+                try:
+                    stat = os.stat(filename)
+                except OSError:
+                    continue
+                ret.append((filename, stat.st_size, stat.st_mtime))
+        ret.sort(key=lambda i: i[2])
+        return ret
+
+    def evict(self):
+        """Remove least recently used files until within `max_size`.
+
+        Files that are being fetched are kept,
+        so total size may still exceed `max_size`.
+        """
+
+        with self._lock:
+            files = self.files()
+            total = sum(i[1] for i in files)
+            for filename, size, _ in files:
+                if total <= self.max_size:
+                    break
+                if filename in self._pinned:
+                    continue
+                LOGGER.debug('Evict: %s', filename)
+                for i in (filename + '.json', filename):
+                    try:
+                        os.remove(i)
+                    except OSError:
+                        pass
+                total -= size
+            self._size = total
+
+
+def _touch(filename):
+    # Modified time is used as last used time.
+    try:
+        os.utime(filename, None)
+    except OSError:
+        pass
+
+
+CACHE = None
+
+
+def get_cache():
+    """Current download cache, create one with default options if needed.
+
+    Returns:
+        DownloadCache: Download cache.
+    """
+
+    global CACHE  # pylint: disable=global-statement
+    if CACHE is None:
+        CACHE = DownloadCache()
+    return CACHE
+
+
+def configure(path=None, max_size=512 * 1024 * 1024, max_age=60):
+    """Configure download cache.
+
+    Args:
+        path (text_type, optional): Defaults to None.
+            Cache directory, if `path` is None, will use `default_path()`.
+        max_size (int, optional): Defaults to 512MiB. Maximum total bytes.
+        max_age (float, optional): Defaults to 60.
+            Seconds a cached file is used without revalidation.
+
+    Returns:
+        DownloadCache: Configured cache.
+    """
+
+    global CACHE  # pylint: disable=global-statement
+    CACHE = DownloadCache(path, max_size, max_age)
+    return CACHE
+
+
+def download_images(images, size='max', token=None, workers=None):
+    """Download images concurrently through the cache.
+
+    Args:
+        images (Iterable[ImageInfo]): Images to download.
+        size (text_type, optional): Defaults to 'max'. 'max' or 'min'.
+        token (text_type, optional): Defaults to None. User token.
+        workers (int, optional): Defaults to None.
+            Maximum concurrent downloads.
+
+    Returns:
+        parallel.BatchResult: `ImageInfo` as key, local filename as value.
+    """
+
+    assert size in ('max', 'min'), size
+    images = set(images)
+    result = get_cache().fetch_many(
+        (getattr(i, size) for i in images), token, workers=workers)
+    ret = parallel.BatchResult({}, {})
+    for i in images:
+        pathname = getattr(i, size)
+        if pathname in result.results:
+            ret.results[i] = result.results[pathname]
+        else:
+            ret.errors[i] = result.errors[pathname]
+    return ret
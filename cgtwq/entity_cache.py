@@ -0,0 +1,338 @@
+# -*- coding=UTF-8 -*-
+"""Optional on-disk cache of fetched entity fields.
+
+Data is stored in a sqlite database under user cache directory,
+so it survives between sessions and can be shared by processes
+on the same workstation.  Disabled by default, use `enable` to turn it on.
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from . import codec, filetools
+
+LOGGER = logging.getLogger(__name__)
+
+# sqlite default limit of variables in one statement is 999.
+_MAX_VARIABLES = 900
+
+_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS entity ('
+    'database TEXT, module TEXT, id TEXT, field TEXT, '
+    'value TEXT, fetched_at REAL, '
+    'PRIMARY KEY (database, module, id, field))',
+    'CREATE TABLE IF NOT EXISTS query ('
+    'database TEXT, module TEXT, key TEXT, '
+    'id_list TEXT, fetched_at REAL, '
+    'PRIMARY KEY (database, module, key))',
+    'CREATE TABLE IF NOT EXISTS upload ('
+    'key TEXT PRIMARY KEY, data TEXT, uploaded_at REAL)',
+    # Empty module or id means all.
+    'CREATE TABLE IF NOT EXISTS invalidation ('
+    'database TEXT, module TEXT, id TEXT, invalidated_at REAL, '
+    'PRIMARY KEY (database, module, id))',
+)
+
+
+def default_path():
+    """Default cache file path in user cache directory.
+
+    Returns:
+        text_type: Cache file path.
+    """
+
+    return filetools.cache_dir('entity_cache.sqlite')
+
+
+def _chunks(items, size):
+    items = list(items)
+    return (items[i:i + size] for i in range(0, len(items), size))
+
+
+class EntityCache(object):
+    """Field values of entities, stored in sqlite.  """
+
+    def __init__(self, path=None, max_age=300):
+        """
+        Args:
+            path (text_type, optional): Defaults to None.
+                Database file path, if `path` is None, will use `default_path()`.
+            max_age (float, optional): Defaults to 300.
+                Seconds a fetched value can be served from cache.
+        """
+
+        self.path = path or default_path()
+        self.max_age = max_age
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'connection', None)
+        if conn is None:
+            filetools.makedirs(os.path.dirname(self.path))
+            # `timeout` make concurrent writer wait instead of fail.
+            conn = sqlite3.connect(self.path, timeout=30)
+            try:
+                conn.execute('PRAGMA journal_mode=WAL')
+            except sqlite3.OperationalError:
+                LOGGER.debug('Can not enable WAL mode: %s', self.path)
+            with conn:
+                for i in _SCHEMA:
+                    conn.execute(i)
+            self._local.connection = conn
+        return conn
+
+    def _min_time(self):
+        return time.time() - self.max_age
+
+    def get_rows(self, database, module, id_list, fields):
+        """Get cached rows that all fields are fresh.
+
+        Args:
+            database (text_type): Database name.
+            module (text_type): Module name.
+            id_list (Iterable[text_type]): Item id.
+            fields (list[text_type]): Server field names.
+
+        Returns:
+            dict: Id as key, row as value(same order with `fields`).
+        """
+
+        fields = list(fields)
+        found = {}
+        conn = self._connection()
+        for chunk in _chunks(set(id_list), _MAX_VARIABLES - len(fields)):
+            cursor = conn.execute(
+                'SELECT id, field, value FROM entity '
+                'WHERE database = ? AND module = ? AND fetched_at >= ? '
+                'AND field IN ({}) AND id IN ({})'.format(
+                    ','.join('?' * len(fields)), ','.join('?' * len(chunk))),
+                [database, module, self._min_time()] + fields + chunk)
+            for id_, field, value in cursor:
+                found.setdefault(id_, {})[field] = value
+        return {k: [codec.loads(v[i]) for i in fields]
+                for k, v in found.items()
+                if len(v) == len(set(fields))}
+
+    @staticmethod
+    def _is_module_invalidated(conn, database, module, fetched_at):
+        return conn.execute(
+            "SELECT 1 FROM invalidation "
+            "WHERE database = ? AND module IN (?, '') "
+            "AND id = '' AND invalidated_at >= ? LIMIT 1",
+            (database, module, fetched_at)).fetchone() is not None
+
+    @staticmethod
+    def _invalidated_ids(conn, database, module, id_list, fetched_at):
+        ret = set()
+        for chunk in _chunks(set(id_list), _MAX_VARIABLES):
+            cursor = conn.execute(
+                'SELECT id FROM invalidation '
+                'WHERE database = ? AND module = ? AND invalidated_at >= ? '
+                'AND id IN ({})'.format(','.join('?' * len(chunk))),
+                [database, module, fetched_at] + chunk)
+            ret.update(i[0] for i in cursor)
+        return ret
+
+    def set_rows(self, database, module, fields, rows, id_index=0,
+                 fetched_at=None):
+        """Save fetched rows.
+
+        Args:
+            database (text_type): Database name.
+            module (text_type): Module name.
+            fields (list[text_type]): Server field names of each column.
+            rows (Iterable[list]): Fetched rows.
+            id_index (int, optional): Defaults to 0. Column index of item id.
+            fetched_at (float, optional): Defaults to None.
+                Timestamp before the request, rows of items
+                invalidated since then are not saved.
+                If `fetched_at` is None, will use current time.
+        """
+
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        rows = list(rows)
+        conn = self._connection()
+        with conn:
+            # Lock database, so invalidation can not happen between
+            # check and insert.
+            conn.execute('BEGIN IMMEDIATE')
+            if self._is_module_invalidated(conn, database, module, fetched_at):
+                LOGGER.debug('Discard changed rows: %s.%s', database, module)
+                return
+            invalidated = self._invalidated_ids(
+                conn, database, module,
+                (row[id_index] for row in rows), fetched_at)
+            values = ((database, module, row[id_index], field,
+                       codec.dumps(value), fetched_at)
+                      for row in rows if row[id_index] not in invalidated
+                      for field, value in zip(fields, row))
+            conn.executemany(
+                'INSERT OR REPLACE INTO entity VALUES (?, ?, ?, ?, ?, ?)',
+                values)
+
+    def get_ids(self, database, module, key):
+        """Get cached id list of a query.
+
+        Args:
+            database (text_type): Database name.
+            module (text_type): Module name.
+            key (text_type): Query key.
+
+        Returns:
+            list or None: Id list, None if not cached.
+        """
+
+        row = self._connection().execute(
+            'SELECT id_list FROM query '
+            'WHERE database = ? AND module = ? AND key = ? AND fetched_at >= ?',
+            (database, module, key, self._min_time())).fetchone()
+        if row is None:
+            return None
+        return codec.loads(row[0])
+
+    def set_ids(self, database, module, key, id_list, fetched_at=None):
+        """Save id list of a query.
+
+        Args:
+            database (text_type): Database name.
+            module (text_type): Module name.
+            key (text_type): Query key.
+            id_list (list[text_type]): Query result.
+            fetched_at (float, optional): Defaults to None.
+                Timestamp before the request, result is not saved
+                if any item in the module invalidated since then.
+                If `fetched_at` is None, will use current time.
+        """
+
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        conn = self._connection()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            # Any change may affect query result.
+            if conn.execute(
+                    'SELECT 1 FROM invalidation '
+                    "WHERE database = ? AND module IN (?, '') "
+                    'AND invalidated_at >= ? LIMIT 1',
+                    (database, module, fetched_at)).fetchone() is not None:
+                LOGGER.debug('Discard changed query: %s.%s', database, module)
+                return
+            conn.execute(
+                'INSERT OR REPLACE INTO query VALUES (?, ?, ?, ?, ?)',
+                (database, module, key, codec.dumps(list(id_list)), fetched_at))
+
+    def invalidate(self, database, module=None, id_list=None):
+        """Remove cache related to changed items.
+
+        Args:
+            database (text_type): Database name.
+            module (text_type, optional): Defaults to None.
+                Module name, None means all module.
+            id_list (Iterable, optional): Defaults to None.
+                Changed item id, None means all item.
+        """
+
+        condition = 'database = ?'
+        params = [database]
+        if module is not None:
+            condition += ' AND module = ?'
+            params.append(module)
+        now = time.time()
+        # Record invalidation time, so rows fetched before it
+        # will not be saved by `set_rows` later.
+        if module is None or id_list is None:
+            invalidations = [(database, module or '', '', now)]
+        else:
+            invalidations = [(database, module, i, now) for i in set(id_list)]
+        conn = self._connection()
+        with conn:
+            conn.execute('DELETE FROM invalidation WHERE invalidated_at < ?',
+                         (self._min_time(),))
+            conn.executemany(
+                'INSERT OR REPLACE INTO invalidation VALUES (?, ?, ?, ?)',
+                invalidations)
+            # Any change may affect query result.
+            conn.execute('DELETE FROM query WHERE ' + condition, params)
+            if id_list is None:
+                conn.execute('DELETE FROM entity WHERE ' + condition, params)
+                return
+            for chunk in _chunks(set(id_list), _MAX_VARIABLES):
+                conn.execute(
+                    'DELETE FROM entity WHERE {} AND id IN ({})'.format(
+                        condition, ','.join('?' * len(chunk))),
+                    params + chunk)
+
+    def get_upload(self, key):
+        """Get saved upload result.
+
+        Upload result is keyed by file content, so it never expires.
+
+        Args:
+            key (text_type): Upload key.
+
+        Returns:
+            dict or None: Server response data, None if not saved.
+        """
+
+        row = self._connection().execute(
+            'SELECT data FROM upload WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        return codec.loads(row[0])
+
+    def set_upload(self, key, data):
+        """Save upload result.
+
+        Args:
+            key (text_type): Upload key.
+            data (dict): Server response data.
+        """
+
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO upload VALUES (?, ?, ?)',
+                (key, codec.dumps(data), time.time()))
+
+    def clear(self):
+        """Remove all cached data.  """
+
+        conn = self._connection()
+        with conn:
+            conn.execute('DELETE FROM entity')
+            conn.execute('DELETE FROM query')
+            conn.execute('DELETE FROM upload')
+            conn.execute('DELETE FROM invalidation')
+
+
+CACHE = None
+
+
+def enable(path=None, max_age=300):
+    """Enable entity cache.
+
+    Args:
+        path (text_type, optional): Defaults to None.
+            Database file path, if `path` is None, will use `default_path()`.
+        max_age (float, optional): Defaults to 300.
+            Seconds a fetched value can be served from cache.
+
+    Returns:
+        EntityCache: Enabled cache.
+    """
+
+    global CACHE  # pylint: disable=global-statement
+    CACHE = EntityCache(path, max_age)
+    return CACHE
+
+
+def disable():
+    """Disable entity cache.  """
+
+    global CACHE  # pylint: disable=global-statement
+    CACHE = None
@@ -108,3 +108,23 @@ class AccountError(CGTeamWorkException):
         '权限不足'))
 class PermissionError(CGTeamWorkException):
     """Indicate suffcient permission.  """
+
+
+class PartialWriteError(CGTeamWorkException):
+    """Indicate chunked write only applied to some items.
+
+    Attributes:
+        succeeded (tuple): Id of items that written.
+        failed (tuple): Id of items that not written.
+        errors (list): Exceptions raised by failed chunks.
+    """
+
+    def __init__(self, succeeded, failed, errors):
+        CGTeamWorkException.__init__(self, succeeded, failed, errors)
+        self.succeeded = tuple(succeeded)
+        self.failed = tuple(failed)
+        self.errors = list(errors)
+
+    def __str__(self):
+        return 'Partial write: {} succeeded, {} failed: {}'.format(
+            len(self.succeeded), len(self.failed), self.errors[0])
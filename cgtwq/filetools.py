@@ -0,0 +1,56 @@
+# -*- coding=UTF-8 -*-
+"""Local file helpers shared by caches.  """
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import os
+
+
+def cache_dir(*paths):
+    """Path in cgtwq directory of user cache directory.
+
+    Args:
+        *paths: Path parts under the cache directory.
+
+    Returns:
+        text_type: Path.
+    """
+
+    root = (os.getenv('LOCALAPPDATA')
+            or os.getenv('XDG_CACHE_HOME')
+            or os.path.expanduser('~/.cache'))
+    return os.path.join(root, 'cgtwq', *paths)
+
+
+def makedirs(path):
+    """Create directory if not exists, safe for concurrent call.
+
+    Args:
+        path (text_type): Directory path.
+    """
+
+    if not path or os.path.isdir(path):
+        return
+    try:
+        os.makedirs(path)
+    except OSError:
+        if not os.path.isdir(path):
+            raise
+
+
+def replace(src, dst):
+    """Rename file and overwrite `dst` atomically when supported.
+
+    Args:
+        src (text_type): Source path.
+        dst (text_type): Destination path.
+    """
+
+    try:
+        os.replace(src, dst)
+    except AttributeError:
+        # Python 2 `os.rename` not overwrite on windows.
+        if os.path.exists(dst):
+            os.remove(dst)
+        os.rename(src, dst)
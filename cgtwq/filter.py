@@ -43,6 +43,24 @@ class FilterList(list):
         return self._combine(other, 'or')
 
 
+def check_combinable(filters):
+    """Check filters can be combined with other filters by `&`.
+
+    Filter list has no grouping,
+    so `(A | B) & C` would be sent as `A or B and C`.
+
+    Args:
+        filters (Filter or FilterList, optional): Filters to check.
+
+    Raises:
+        ValueError: When filters contains `or`.
+    """
+
+    if filters and 'or' in FilterList(filters):
+        raise ValueError(
+            'Filters that contains "or" can not be combined.', filters)
+
+
 class Field(text_type):
     """Data base field name for filter.  """
 
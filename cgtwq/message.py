@@ -4,12 +4,11 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
-import json
 import logging
 
 import six
 
-from . import server
+from . import codec, parallel, server
 from .model import ImageInfo
 
 LOGGER = logging.getLogger(__name__)
@@ -41,13 +40,16 @@ class Message(six.text_type):
         """Dump data to string in server defined format.  """
 
         self._check_images()
-        return json.dumps({'data': self, 'image': [i._asdict() for i in self.images]})
+        return codec.dumps({'data': self, 'image': [i._asdict() for i in self.images]})
 
     def upload_images(self, folder, token):
-        """Upload contianed images to server. will replace items in `self.image`.  """
+        """Upload contianed images to server concurrently.
 
-        for index, img in enumerate(self.images):
-            self.images[index] = _upload_image(img, folder, token)
+        Items in `self.image` will be replaced.
+        """
+
+        self.images[:] = parallel.run(
+            lambda img: _upload_image(img, folder, token), self.images)
 
     @classmethod
     def load(cls, data):
@@ -59,7 +61,7 @@ class Message(six.text_type):
         data = data or ''
 
         try:
-            data = json.loads(data)
+            data = codec.loads(data)
             assert isinstance(data, dict), type(data)
             text = data.get('data', '')
             images = data.get('image', data.get('images', []))
@@ -0,0 +1,216 @@
+# -*- coding=UTF-8 -*-
+"""Local mirror of module data, updated with history records.  """
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import logging
+import time
+from collections import namedtuple
+
+from .filter import Field, Filter, check_combinable
+from .resultset import ResultSet
+
+LOGGER = logging.getLogger(__name__)
+
+
+class MirrorDiff(namedtuple('MirrorDiff', ('added', 'removed', 'changed'))):
+    """Mirror changes.
+
+    `added` and `removed` are dict with id as key, row as value.
+    `changed` is dict with id as key, (old_row, new_row) as value.
+    """
+
+
+class ModuleMirror(object):
+    """Keep fields of module items in memory.
+
+    After first `load`, each `update` only fetches history records
+    newer than last watermark, then refetch items touched by them.
+    So cost is proportional to change rate instead of module size.
+
+    Items that changed without creating history (e.g. newly created items)
+    only appear after next `load`.
+    """
+
+    time_format = '%Y-%m-%d %H:%M:%S'
+    # Seconds to look back on first update, covers clock difference
+    # between server and local.
+    clock_skew = 60
+
+    def __init__(self, module, fields, filters=None):
+        """
+        Args:
+            module (Module): Module to mirror.
+            fields (Iterable[text_type]): Fields to mirror,
+                `id` field will be prepended if not included.
+            filters (Filter or FilterList, optional): Defaults to None.
+                Only mirror items that match filters, must not contains `or`.
+
+        Raises:
+            ValueError: When `filters` contains `or`.
+        """
+
+        from .module import Module
+        assert isinstance(module, Module)
+        check_combinable(filters)
+        self.module = module
+        self.filters = filters
+        self.fields = [module.field(i) for i in fields]
+        id_field = module.field('id')
+        if id_field not in self.fields:
+            self.fields.insert(0, id_field)
+        self._id_index = self.fields.index(id_field)
+        self.rows = {}
+        self.watermark = None
+        self._watermark_history = set()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, id_):
+        return id_ in self.rows
+
+    def _filters(self, id_list=None):
+        ret = Field('id').has('%')
+        if id_list is not None:
+            ret = Field('id') | list(id_list)
+        if self.filters:
+            ret &= self.filters
+        return ret
+
+    def _query(self, id_list=None):
+        return self.module.query(self._filters(id_list), *self.fields)
+
+    def load(self):
+        """Load all items from server.  """
+
+        self.watermark = time.strftime(
+            self.time_format, time.localtime(time.time() - self.clock_skew))
+        self._watermark_history = set()
+        index = self._id_index
+        self.rows = {i[index]: i for i in self._query()}
+        LOGGER.debug('Mirror loaded: %s: %d items',
+                     self.module.name, len(self.rows))
+
+    def _fetch_history(self):
+        filters = Filter('time', self.watermark, '>=')
+        # Count is cheaper, skip fetch when only known records exists.
+        if self.module.count_history(filters) <= len(self._watermark_history):
+            return []
+        records = self.module.get_history(filters)
+        return [i for i in records if i.id not in self._watermark_history]
+
+    def update(self):
+        """Update mirror with new history records.
+
+        Returns:
+            set: Id of changed items.
+        """
+
+        if self.watermark is None:
+            self.load()
+            return set(self.rows)
+        diff = self._update()
+        return set(diff.added) | set(diff.removed) | set(diff.changed)
+
+    def poll(self):
+        """Update mirror and get change detail.
+
+        Returns:
+            MirrorDiff: Changes since last update,
+                all items are `added` if not loaded before.
+        """
+
+        if self.watermark is None:
+            self.load()
+            return MirrorDiff(dict(self.rows), {}, {})
+        return self._update()
+
+    def _update(self):
+        diff = MirrorDiff({}, {}, {})
+        records = self._fetch_history()
+        if not records:
+            return diff
+
+        id_list = set(i.task_id for i in records)
+        index = self._id_index
+        fetched = {i[index]: i for i in self._query(id_list)}
+        for i in id_list:
+            old = self.rows.get(i)
+            new = fetched.get(i)
+            if new is not None:
+                self.rows[i] = new
+            else:
+                # Deleted or not match filters any more.
+                self.rows.pop(i, None)
+
+            if old is None and new is not None:
+                diff.added[i] = new
+            elif old is not None and new is None:
+                diff.removed[i] = old
+            elif old != new:
+                diff.changed[i] = (old, new)
+
+        watermark = max(i.time for i in records)
+        if watermark != self.watermark:
+            self._watermark_history = set()
+        self._watermark_history.update(
+            i.id for i in records if i.time == watermark)
+        self.watermark = watermark
+        LOGGER.debug('Mirror updated: %s: %d items',
+                     self.module.name, len(id_list))
+        return diff
+
+    def get(self, id_, default=None):
+        """Get mirrored row of item.
+
+        Args:
+            id_ (text_type): Item id.
+            default (optional): Defaults to None.
+                Value when item not in mirror.
+
+        Returns:
+            list: Row with same order as `fields`.
+        """
+
+        return self.rows.get(id_, default)
+
+    def to_result_set(self):
+        """Current data as result set.
+
+        Returns:
+            ResultSet: Mirrored data.
+        """
+
+        return ResultSet(self.fields, self.rows.values(), self.module)
+
+
+def watch(module, filters, fields, interval=5, max_interval=60, backoff=2):
+    """Watch module items, yield changes.
+
+    Args:
+        module (Module): Module to watch.
+        filters (Filter or FilterList): Only watch items that match filters.
+        fields (Iterable[text_type]): Fields to watch.
+        interval (float, optional): Defaults to 5. Seconds between polls.
+        max_interval (float, optional): Defaults to 60.
+            Maximum seconds between polls.
+        backoff (float, optional): Defaults to 2. Interval multiplier
+            after each poll without change, reset when change occurred.
+
+    Yields:
+        MirrorDiff: Changes, first one contains all items as `added`.
+    """
+
+    mirror = ModuleMirror(module, fields, filters)
+    yield mirror.poll()
+    wait = interval
+    while True:
+        time.sleep(wait)
+        diff = mirror.poll()
+        if any(diff):
+            wait = interval
+            yield diff
+        else:
+            wait = min(wait * backoff, max_interval)
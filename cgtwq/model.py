@@ -24,12 +24,28 @@ class NoteInfo(namedtuple('NoteInfo',
                           ('id', 'task_id', 'account_id',
                            'html', 'time', 'account_name',
                            'module'))):
-    """Note informatiom.  """
+    """Note informatiom.
+
+    Items keep the raw server row,
+    `message` is parsed from `html` on first access.
+    """
 
     fields = ('#id', '#task_id', '#from_account_id',
               'text', 'time', 'create_by',
               'module')
 
+    @property
+    def message(self):
+        """Message: Parsed note text.  """
+
+        return _lazy_message(self, 'html')
+
+    @classmethod
+    def from_row(cls, row):
+        """Create record from a server row with single allocation.  """
+
+        return cls._make(row)
+
 
 class HistoryInfo(
         namedtuple(
@@ -38,18 +54,40 @@ class HistoryInfo(
              'step', 'status', 'file',
              'text', 'create_by', 'time')
         )):
-    """History information.   """
+    """History information.
+
+    Items keep the raw server row,
+    `text` is parsed to `Message` on first access.
+    """
 
     fields = ('#id', '#task_id', '#account_id',
               'step', 'status', 'file',
               'text', 'create_by', 'time')
 
-    def __new__(cls, *args, **kwargs):
-        from .message import Message
-        raw = super(HistoryInfo, cls).__new__(cls, *args, **kwargs)
-        data = raw._asdict()
-        data['text'] = Message.load(raw.text)
-        return super(HistoryInfo, cls).__new__(cls, **data)
+    @property
+    def text(self):
+        """Message: Parsed history text.  """
+
+        return _lazy_message(self, 'text')
+
+    @classmethod
+    def from_row(cls, row):
+        """Create record from a server row with single allocation.  """
+
+        return cls._make(row)
+
+
+def _lazy_message(record, field):
+    # Parse once and store on the instance,
+    # reading raw value through tuple index.
+    try:
+        return record.__dict__['_message']
+    except KeyError:
+        pass
+    from .message import Message
+    ret = Message.load(record[record._fields.index(field)])
+    record.__dict__['_message'] = ret
+    return ret
 
 
 class FileBoxInfo(namedtuple(
@@ -3,13 +3,19 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import collections
 import logging
+import threading
+import time
+from multiprocessing.pool import ThreadPool
 
 from six import text_type
 
+from . import codec, entity_cache, parallel, unitofwork
 from .core import ControllerGetterMixin
-from .filter import Filter, FilterList
+from .filter import Filter, FilterList, check_combinable
 from .model import FieldInfo, HistoryInfo
+from .resultset import ResultSet
 from .selection import Selection
 
 LOGGER = logging.getLogger(__name__)
@@ -58,6 +64,15 @@ class Module(ControllerGetterMixin):
                                   module_type=self.module_type,
                                   **kwargs)
 
+    def iter_call(self, *args, **kwargs):
+        """Streaming call on this module, for methods that return a list.  """
+
+        kwargs.setdefault('token', self.token)
+        return self.database.iter_call(*args,
+                                       module=self.name,
+                                       module_type=self.module_type,
+                                       **kwargs)
+
     def select(self, *id_list):
         """Create selection on this module.
 
@@ -81,6 +96,13 @@ class Module(ControllerGetterMixin):
         """
 
         _filters = self.format_filters(filters)
+        store = entity_cache.CACHE
+        if store is not None:
+            key = codec.dumps(_filters)
+            id_list = store.get_ids(self.database.name, self.name, key)
+            if id_list is not None:
+                return Selection(self, *id_list)
+        fetched_at = time.time()
         resp = self.call('c_orm', 'get_with_filter',
                          sign_array=(self.field('id'),),
                          sign_filter_array=_filters)
@@ -88,8 +110,94 @@ class Module(ControllerGetterMixin):
             id_list = [i[0] for i in resp]
         else:
             id_list = []
+        if store is not None:
+            store.set_ids(self.database.name, self.name, key, id_list,
+                          fetched_at)
         return Selection(self, *id_list)
 
+    def query(self, filters, *fields):
+        """Get fields of items that match filters, in one request.
+
+        Args:
+            filters (FilterList, Filter): Filters for server.
+            *fields: Server defined field sign,
+                `id` field will be prepended if not included.
+
+        Returns:
+            ResultSet: Query result,
+                use `ResultSet.to_selection` to create selection.
+        """
+
+        server_fields = [self.field(i) for i in fields]
+        id_field = self.field('id')
+        if id_field not in server_fields:
+            server_fields.insert(0, id_field)
+        resp = self.call('c_orm', 'get_with_filter',
+                         sign_array=server_fields,
+                         sign_filter_array=self.format_filters(filters),
+                         order_sign_array=server_fields)
+        return ResultSet(server_fields, resp or [], self)
+
+    def watch(self, filters, *fields, **kwargs):
+        """Watch items that match filters, yield changes.
+
+        Args:
+            filters (FilterList, Filter): Filters for server.
+            *fields: Server defined field sign to watch.
+            **kwargs:
+                interval (float): Defaults to 5. Seconds between polls.
+                max_interval (float): Defaults to 60.
+                    Maximum seconds between polls when module is idle.
+                backoff (float): Defaults to 2. Interval multiplier
+                    after each poll without change.
+
+        Yields:
+            mirror.MirrorDiff: Changes, first one contains all items as `added`.
+        """
+
+        from .mirror import watch
+        return watch(self, filters, fields, **kwargs)
+
+    def set_many(self, data, workers=None, callback=None):
+        """Set different field data for each item.
+
+        Items that receive identical data are written in one request,
+        requests are sent concurrently.
+
+        Args:
+            data (dict): Item id as key,
+                dict of field name and value as value.
+            workers (int, optional): Defaults to None.
+                Maximum concurrent requests.
+            callback (callable, optional): Defaults to None.
+                Called as `callback(finished, total)` after each request.
+
+        Returns:
+            parallel.BatchResult: Tuple of item id in each request as key.
+        """
+
+        changes = {id_: {self.field(k): v for k, v in fields.items()}
+                   for id_, fields in data.items() if fields}
+        groups = {tuple(id_list): fields
+                  for fields, id_list
+                  in unitofwork.group_by_payload(changes)}
+        lock = threading.Lock()
+        finished = [0]
+
+        def _set(id_list):
+            try:
+                return self.select(*id_list).call(
+                    'c_orm', 'set_in_id', sign_data_array=groups[id_list])
+            finally:
+                if callback is not None:
+                    with lock:
+                        finished[0] += 1
+                        callback(finished[0], len(groups))
+
+        LOGGER.debug('Set many: %s: %d items in %d requests',
+                     self.name, len(changes), len(groups))
+        return parallel.settle(_set, groups, workers)
+
     def field(self, name):
         """Formatted field name for this module.
 
@@ -161,6 +269,76 @@ class Module(ControllerGetterMixin):
             filter_array=FilterList(filters))
         return int(resp)
 
+    def iter_history(self, filters=None, page_size=2000,
+                     start=None, end=None, workers=None):
+        """Iterate history records in time order, page by page.
+
+        Time range is split into windows by bisection,
+        each window has at most `page_size` records (by `count_history`)
+        unless all records are in the same second.
+        Windows are fetched concurrently,
+        at most `workers` pages are kept in memory.
+
+        Args:
+            filters (Filter or FilterList, optional): Defaults to None.
+                Addtional history filters, must not contains `or`.
+            page_size (int, optional): Defaults to 2000.
+                Maximum records per request.
+            start (float, optional): Defaults to None.
+                Start timestamp, if `start` is None, will use 0.
+            end (float, optional): Defaults to None.
+                End timestamp (exclusive),
+                if `end` is None, will use current time.
+            workers (int, optional): Defaults to None.
+                Maximum concurrent requests,
+                if `workers` is None, will use `parallel.MAX_WORKERS`.
+
+        Raises:
+            ValueError: When `filters` contains `or`.
+
+        Returns:
+            Iterator[HistoryInfo]: History records.
+        """
+
+        # Checked before iteration, so error raises on call.
+        check_combinable(filters)
+        return self._iter_history(filters, page_size, start, end, workers)
+
+    def _iter_history(self, filters, page_size, start, end, workers):
+        def _filters(window):
+            ret = (Filter('time', _format_time(window[0]), '>=')
+                   & Filter('time', _format_time(window[1]), '<'))
+            if filters:
+                ret &= filters
+            return ret
+
+        def _fetch(window):
+            ret = list(self.get_history(_filters(window)))
+            ret.sort(key=lambda i: i.time)
+            return ret
+
+        windows = _iter_windows(
+            lambda window: self.count_history(_filters(window)),
+            int(start or 0),
+            int(time.time()) + 1 if end is None else int(end),
+            page_size)
+        workers = workers or parallel.MAX_WORKERS
+        pool = ThreadPool(workers)
+        try:
+            pending = collections.deque()
+            for window in windows:
+                pending.append(pool.apply_async(_fetch, (window,)))
+                if len(pending) < workers:
+                    continue
+                for i in pending.popleft().get():
+                    yield i
+            while pending:
+                for i in pending.popleft().get():
+                    yield i
+        finally:
+            pool.terminate()
+            pool.join()
+
     def join_module_list(self):
         resp = self.call(
             'c_module',
@@ -214,3 +392,27 @@ class Module(ControllerGetterMixin):
     #         'c_work_flow', 'is_status_field_in_flow',
     #         field_sign=field)
     #     return resp
+
+
+def _format_time(timestamp):
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))
+
+
+def _iter_windows(count, start, end, size):
+    # Yield (start, end) windows in time order,
+    # split a window in half while it has more than `size` records.
+    stack = [(start, end)]
+    while stack:
+        window = stack.pop()
+        total = count(window)
+        if not total:
+            continue
+        start, end = window
+        if total <= size or end - start <= 1:
+            LOGGER.debug('History window: %s-%s: %d records',
+                         start, end, total)
+            yield window
+            continue
+        middle = (start + end) // 2
+        stack.append((middle, end))
+        stack.append((start, middle))
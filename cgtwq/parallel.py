@@ -0,0 +1,125 @@
+# -*- coding=UTF-8 -*-
+"""Run server requests concurrently.  """
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import logging
+import threading
+from collections import namedtuple
+from multiprocessing.pool import ThreadPool
+
+LOGGER = logging.getLogger(__name__)
+
+MAX_WORKERS = 8
+
+
+def run(func, items, workers=None):
+    """Call `func` on every item with a bounded thread pool.
+
+    Args:
+        func (callable): Function that takes one item.
+        items (Iterable): Items to process.
+        workers (int, optional): Defaults to None.
+            Maximum thread count, if `workers` is None, will use `MAX_WORKERS`.
+
+    Raises:
+        Exception: First exception raised by `func`.
+
+    Returns:
+        list: Results with same order as `items`.
+    """
+
+    items = list(items)
+    workers = min(workers or MAX_WORKERS, len(items))
+    if workers <= 1:
+        return [func(i) for i in items]
+
+    pool = ThreadPool(workers)
+    try:
+        return pool.map(func, items, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+
+class BatchResult(namedtuple('BatchResult', ('results', 'errors'))):
+    """Result of `settle`.
+
+    `results` is dict with item as key, return value as value.
+    `errors` is dict with item as key, raised exception as value.
+    """
+
+
+def settle(func, items, workers=None):
+    """Like `run`, but exception of one item not abort others.
+
+    Args:
+        func (callable): Function that takes one item.
+        items (Iterable): Hashable items to process.
+        workers (int, optional): Defaults to None.
+            Maximum thread count, if `workers` is None, will use `MAX_WORKERS`.
+
+    Returns:
+        BatchResult: Results and errors keyed by item.
+    """
+
+    def _call(item):
+        try:
+            return item, func(item), None
+        except Exception as ex:  # pylint: disable=broad-except
+            LOGGER.debug('Failed: %s: %s', item, ex)
+            return item, None, ex
+
+    ret = BatchResult({}, {})
+    for item, result, error in run(_call, items, workers):
+        if error is None:
+            ret.results[item] = result
+        else:
+            ret.errors[item] = error
+    return ret
+
+
+class ChunkSizeTuner(object):
+    """Tune request chunk size from observed latency.
+
+    Chunk size moves toward the size that server can finish
+    in `target_time` seconds.
+    """
+
+    def __init__(self, size=2000, target_time=5.0,
+                 min_size=100, max_size=20000):
+        """
+        Args:
+            size (int, optional): Defaults to 2000. Initial chunk size.
+            target_time (float, optional): Defaults to 5.0.
+                Expected seconds for server to process one chunk.
+            min_size (int, optional): Defaults to 100. Minimum chunk size.
+            max_size (int, optional): Defaults to 20000. Maximum chunk size,
+                set it equal to `min_size` to disable auto tuning.
+        """
+
+        self._lock = threading.Lock()
+        self.target_time = target_time
+        self.min_size = min_size
+        self.max_size = max_size
+        self.size = self._clamp(size)
+
+    def _clamp(self, size):
+        return int(max(self.min_size, min(self.max_size, size)))
+
+    def feedback(self, count, seconds):
+        """Update chunk size from a finished chunk.
+
+        Args:
+            count (int): Item count in the chunk.
+            seconds (float): Time used to process the chunk.
+        """
+
+        if seconds <= 0 or count <= 0:
+            return
+        ideal = count / seconds * self.target_time
+        with self._lock:
+            # Smooth with last value to avoid oscillation.
+            self.size = self._clamp((self.size + ideal) / 2)
+        LOGGER.debug('Chunk size: %s', self.size)
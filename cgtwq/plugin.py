@@ -4,10 +4,9 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
-import json
 from functools import partial
 
-from . import server
+from . import codec, server
 from .server import setting
 
 
@@ -25,7 +24,7 @@ class PlugIn(object):
     def set_argvs(self, **data):
         self.call('set_one_with_id',
                   id=self.id,
-                  field_data_array={'argv': json.dumps(data)})
+                  field_data_array={'argv': codec.dumps(data)})
 
     @classmethod
     def _get_with(cls, controller, method, **kwargs):
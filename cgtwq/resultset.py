@@ -5,31 +5,169 @@ from __future__ import (absolute_import, division, print_function,
 
 import logging
 
+from six.moves import zip  # pylint: disable=redefined-builtin
+
+try:
+    from collections.abc import Sequence
+except ImportError:
+    from collections import Sequence
+
 LOGGER = logging.getLogger(__name__)
 
 
-class ResultSet(list):
-    """Database query result.  """
+class ResultSet(Sequence):
+    """Database query result.
+
+    Data is stored by column,
+    iterate or index it to get rows as list.
+
+    It is a read-only sequence, not a `list` subclass:
+    `sort`, in-place modification and `isinstance(result, list)`
+    are not supported, use `to_list` to get a list of rows.
+    `codec.dumps` serializes it as a list,
+    stdlib `json.dumps` needs `to_list` first.
+    """
+
+    __hash__ = None
 
     def __init__(self, roles, data, module):
+        """
+        Args:
+            roles (list): Field names of each column.
+            data (Iterable[list]): Rows, can be a generator.
+            module (Module): Related module.
+        """
+
         from .module import Module
         assert isinstance(module, Module)
-        assert all(isinstance(i, list) and len(i) == len(roles)
-                   for i in data), data
-        super(ResultSet, self).__init__(data)
         self.module = module
         self.roles = roles
+        self._role_index = {}
+        for index, role in enumerate(roles):
+            self._role_index.setdefault(role, index)
+        self._cache = {}
+
+        columns = tuple([] for _ in roles)
+        appends = tuple(i.append for i in columns)
+        width = len(roles)
+        length = 0
+        for row in data:
+            assert isinstance(row, list) and len(row) == width, row
+            for append, value in zip(appends, row):
+                append(value)
+            length += 1
+        self._columns = columns
+        self._length = length
 
-    def column(self, field):
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('ResultSet index out of range.', index)
+        return [i[index] for i in self._columns]
+
+    def __iter__(self):
+        if not self._columns:
+            return iter([] for _ in range(self._length))
+        return (list(i) for i in zip(*self._columns))
+
+    def __eq__(self, other):
+        if not isinstance(other, (ResultSet, list, tuple)):
+            return NotImplemented
+        return len(self) == len(other) and all(
+            i == list(j) for i, j in zip(self, other))
+
+    def __ne__(self, other):
+        ret = self.__eq__(other)
+        if ret is NotImplemented:
+            return ret
+        return not ret
+
+    def __add__(self, other):
+        if not isinstance(other, (ResultSet, list, tuple)):
+            return NotImplemented
+        return self.to_list() + [list(i) for i in other]
+
+    def __radd__(self, other):
+        if not isinstance(other, (list, tuple)):
+            return NotImplemented
+        return [list(i) for i in other] + self.to_list()
+
+    def __repr__(self):
+        return '{}({!r}, {!r})'.format(
+            type(self).__name__, self.roles, list(self))
+
+    def to_list(self):
+        """Rows as a new list.
+
+        Returns:
+            list[list]: Rows.
+        """
+
+        return list(self)
+
+    def _column_index(self, field):
+        field = self.module.field(field)
+        try:
+            return self._role_index[field]
+        except KeyError:
+            raise ValueError('Field not in result set.', field)
+
+    def column(self, field, distinct=True):
         """Get a column from field name.
 
         Args:
             field (text_type): Field name.
+            distinct (bool, optional): Defaults to True.
+                If `distinct` is True, return sorted unique values,
+                otherwise return values with row order.
 
         Returns:
             tuple: Column data.
         """
 
-        field = self.module.field(field)
-        index = self.roles.index(field)
-        return tuple(sorted(set(i[index] for i in self)))
+        index = self._column_index(field)
+        key = ('column', index, distinct)
+        if key not in self._cache:
+            values = self._columns[index]
+            self._cache[key] = (tuple(sorted(set(values)))
+                                if distinct else tuple(values))
+        return self._cache[key]
+
+    def index_by(self, field):
+        """Get a hash index on the field for fast row lookup.
+
+        Args:
+            field (text_type): Field name, usually `id`.
+
+        Returns:
+            dict: Field value as key, row as value.
+                If values duplicate, first row will be used.
+                Rows are shared between calls, do not modify them.
+        """
+
+        index = self._column_index(field)
+        key = ('index', index)
+        if key not in self._cache:
+            ret = {}
+            for row in self:
+                ret.setdefault(row[index], row)
+            self._cache[key] = ret
+        return self._cache[key]
+
+    def to_selection(self):
+        """Create selection from the `id` column.
+
+        Raises:
+            ValueError: When result set is empty.
+
+        Returns:
+            Selection: Selection of all items in the result set.
+        """
+
+        return self.module.select(*self.column('id'))
@@ -21,3 +21,12 @@ class SelectionAttachment(object):
         assert isinstance(selection, Selection)
         self.select = selection
         self.call = self.select.call
+
+    def _select_one(self, id_):
+        """One item selection with same token,
+        so request and cache invalidation only cover that item.
+        """
+
+        ret = self.select.module.select(id_)
+        ret.token = self.select.token
+        return ret
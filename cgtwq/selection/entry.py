@@ -4,16 +4,25 @@ from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
 from six import text_type
+from six.moves import zip  # pylint: disable=redefined-builtin
 
+from ..cache import WRITE_METHODS
 from .selection import Selection
 
 
 class Entry(Selection):
-    """A selection that only has one item.  """
+    """A selection that only has one item.
+
+    Attributes:
+        prefetched (dict): Server field name as key, field value as value.
+            These fields are served locally by `get_fields`,
+            cleared when entry data changed through this entry.
+    """
 
     def __init__(self, module, id_):
         assert isinstance(id_, text_type), type(id_)
         super(Entry, self).__init__(module, id_)
+        self.prefetched = {}
 
     def __getitem__(self, name):
         if isinstance(name, int):
@@ -27,11 +36,28 @@ class Entry(Selection):
             tuple: Result fields with exactly same order with `fields`.
         """
 
-        ret = super(Entry, self).get_fields(*fields)
+        server_fields = [self.module.field(i) for i in fields]
+        missing = []
+        for i in server_fields:
+            if i not in self.prefetched and i not in missing:
+                missing.append(i)
+        if not missing:
+            return tuple(self.prefetched[i] for i in server_fields)
+
+        ret = super(Entry, self).get_fields(*missing)
         assert len(ret) == 1, ret
         ret = ret[0]
         assert isinstance(ret, list), ret
-        return tuple(ret)
+        if not self.prefetched and missing == server_fields:
+            return tuple(ret)
+        values = dict(self.prefetched)
+        values.update(zip(missing, ret))
+        return tuple(values[i] for i in server_fields)
+
+    def call(self, *args, **kwargs):
+        if tuple(args[:2]) in WRITE_METHODS:
+            self.prefetched.clear()
+        return super(Entry, self).call(*args, **kwargs)
 
     def get_image(self, field='image'):
         """Get imageinfo used on the field.
@@ -10,7 +10,7 @@ import six
 
 from wlf.codectools import get_encoded as e
 
-from .. import account, exceptions
+from .. import account, exceptions, parallel
 from ..message import Message
 from .base import SelectionAttachment
 
@@ -25,12 +25,17 @@ class SelectionFlow(SelectionAttachment):
         select = self.select
         message = Message.load(message)
         message.images += images
+        self._update_flow(self.call, select.module.field(field), status,
+                          message.dumps(), select[0])
+
+    @staticmethod
+    def _update_flow(call, field_sign, status, text, task_id):
         try:
-            self.call('c_work_flow', 'python_update_flow',
-                      field_sign=select.module.field(field),
-                      status=status,
-                      text=message.dumps(),
-                      task_id=select[0])
+            call('c_work_flow', 'python_update_flow',
+                 field_sign=field_sign,
+                 status=status,
+                 text=text,
+                 task_id=task_id)
         except ValueError as ex:
             if (ex.args
                     and ex.args[0] == ('work_flow::python_update_flow, '
@@ -38,6 +43,37 @@ class SelectionFlow(SelectionAttachment):
                 raise exceptions.PermissionError
             raise
 
+    def bulk_update(self, field, status, message='', images=(), workers=None):
+        """Update flow status of every task in the selection concurrently.
+
+        Images are uploaded once and shared by all tasks.
+
+        Args:
+            field (text_type): Server defined status field name.
+            status (text_type): Target status.
+            message (Message, optional): Defaults to ''. Note(and images).
+            images (tuple, optional): Defaults to ().
+                Additional images, can be local filename or `ImageInfo`.
+            workers (int, optional): Defaults to None.
+                Maximum concurrent requests.
+
+        Returns:
+            parallel.BatchResult: Task id as key,
+                task without permission has `PermissionError` in `errors`.
+        """
+
+        select = self.select
+        message = Message.load(message)
+        ret = Message(message)
+        ret.images = list(message.images) + list(images)
+        ret.upload_images(select.module.database.name, select.token)
+        field_sign = select.module.field(field)
+        text = ret.dumps()
+        return parallel.settle(
+            lambda id_: self._update_flow(
+                self._select_one(id_).call, field_sign, status, text, id_),
+            select, workers)
+
     def submit(self, filenames=(), message="", account_id=None):
         """Submit file to task, then change status to `Check`.
 
@@ -56,13 +92,17 @@ class SelectionFlow(SelectionAttachment):
         for i in filenames:
             path_data['path' if os.path.isdir(e(i)) else 'file_path'].append(i)
 
-        select.call(
-            "c_work_flow", "submit",
-            task_id=select[0],
-            account_id=account_id,
-            version_id=self.create_version(filenames),
-            submit_file_path_array=path_data,
-            text=message.dumps())
+        try:
+            select.call(
+                "c_work_flow", "submit",
+                task_id=select[0],
+                account_id=account_id,
+                version_id=self.create_version(filenames),
+                submit_file_path_array=path_data,
+                text=message.dumps())
+        except exceptions.LoginError:
+            account.invalidate(select.token)
+            raise
 
     def create_version(self, filenames, sign='Api Submit', version_id=None):
         """Create new task version.
@@ -138,3 +178,18 @@ class SelectionFlow(SelectionAttachment):
         """Shorthand method to set take status to `Retake`.  """
 
         return self.update(field, 'Retake', message, images)
+
+    def bulk_close(self, field, message='', images=(), workers=None):
+        """Shorthand method to set status of all tasks to `Close`.  """
+
+        return self.bulk_update(field, 'Close', message, images, workers)
+
+    def bulk_approve(self, field, message='', images=(), workers=None):
+        """Shorthand method to set status of all tasks to `Approve`.  """
+
+        return self.bulk_update(field, 'Approve', message, images, workers)
+
+    def bulk_retake(self, field, message='', images=(), workers=None):
+        """Shorthand method to set status of all tasks to `Retake`.  """
+
+        return self.bulk_update(field, 'Retake', message, images, workers)
@@ -3,6 +3,7 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+from .. import parallel
 from .base import SelectionAttachment
 
 
@@ -39,3 +40,45 @@ class SelectionLink(SelectionAttachment):
             resp = select.call("c_link", "get_link_id", id=id_)
             ret.add(resp)
         return ret
+
+    def bulk_unlink(self, *id_list, **kwargs):
+        """Unlink each item in the selection concurrently.
+
+        Args:
+            *id_list: Id of items to unlink.
+            **kwargs:
+                workers (int, optional): Defaults to None.
+                    Maximum concurrent requests.
+
+        Raises:
+            TypeError: When got unexpected keyword argument.
+
+        Returns:
+            parallel.BatchResult: Selection id as key.
+        """
+
+        workers = kwargs.pop('workers', None)
+        if kwargs:
+            raise TypeError('Unexpected keyword arguments.', list(kwargs))
+        return parallel.settle(
+            lambda id_: self._select_one(id_).call(
+                "c_link", "remove_link_id",
+                id=id_, link_id_array=id_list),
+            self.select, workers)
+
+    def bulk_get(self, workers=None):
+        """Get linked items for each item in the selection concurrently.
+
+        Args:
+            workers (int, optional): Defaults to None.
+                Maximum concurrent requests.
+
+        Returns:
+            parallel.BatchResult: Selection id as key,
+                linked items as value.
+        """
+
+        return parallel.settle(
+            lambda id_: self._select_one(id_).call(
+                "c_link", "get_link_id", id=id_),
+            self.select, workers)
@@ -22,7 +22,7 @@ class SelectionNotify(SelectionAttachment):
         resp = select.call("c_note", "get_with_task_id",
                            task_id=select[0],
                            field_array=NoteInfo.fields)
-        return tuple(NoteInfo(*i) for i in resp)
+        return tuple(NoteInfo.from_row(i) for i in resp)
 
     def add(self, text, account, images=()):
         """Add note to selected items.
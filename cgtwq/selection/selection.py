@@ -3,12 +3,17 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
-import json
+import heapq
+import logging
+import time
 
 from six import text_type
+from six.moves import zip  # pylint: disable=redefined-builtin
 
 from wlf.decorators import deprecated
 
+from .. import cache, codec, entity_cache, parallel, unitofwork
+from ..exceptions import PartialWriteError
 from ..filter import Field
 from ..model import ImageInfo
 from ..resultset import ResultSet
@@ -20,10 +25,25 @@ from .history import SelectionHistory
 from .link import SelectionLink
 from .notify import SelectionNotify
 
+LOGGER = logging.getLogger(__name__)
+
 
 class Selection(tuple):
-    """Selection with all feature.  """
+    """Selection with all feature.
+
+    Attributes:
+        chunk_tuners (dict): (controller, method) as key,
+            `parallel.ChunkSizeTuner` as value.
+            Call on these methods will be split to chunks when
+            selection is larger than chunk size, then dispatched concurrently.
+            Only reads are chunked by default, add write methods
+            (e.g. `('c_orm', 'set_in_id')`) to opt in,
+            a failed write chunk raises `PartialWriteError`.
+    """
     _token = None
+    chunk_tuners = {
+        ('c_orm', 'get_in_id'): parallel.ChunkSizeTuner(),
+    }
 
     def __new__(cls, module, *id_list):
         # pylint: disable=unused-argument
@@ -72,10 +92,46 @@ class Selection(tuple):
         self._token = value
 
     def call(self, *args, **kwargs):
-        """Call on this selection.   """
+        """Call on this selection.
+
+        Large selection will be split into chunks
+        for methods in `chunk_tuners`.
+        """
 
         kwargs.setdefault('token', self.token)
-        return self.module.call(*args, id_array=self, **kwargs)
+        tuner = self.chunk_tuners.get(tuple(args[:2]))
+        order_key = _order_key(kwargs)
+        if (tuner is None or len(self) <= tuner.size
+                # Chunks can not be merged in server order.
+                or ('order_sign_array' in kwargs and order_key is None)):
+            return self.module.call(*args, id_array=self, **kwargs)
+
+        id_list = tuple(self)
+        size = tuner.size
+        chunks = [id_list[i:i + size] for i in range(0, len(id_list), size)]
+
+        def _call(chunk):
+            start = time.time()
+            ret = self.module.call(*args, id_array=chunk, **kwargs)
+            tuner.feedback(len(chunk), time.time() - start)
+            return ret
+
+        if tuple(args[:2]) not in cache.WRITE_METHODS:
+            return _merge_results(parallel.run(_call, chunks), order_key)
+
+        result = parallel.settle(_call, chunks)
+        if result.errors:
+            raise PartialWriteError(
+                [j for i in chunks if i in result.results for j in i],
+                [j for i in chunks if i in result.errors for j in i],
+                [result.errors[i] for i in chunks if i in result.errors])
+        return _merge_results([result.results[i] for i in chunks])
+
+    def iter_call(self, *args, **kwargs):
+        """Streaming call on this selection, for methods that return a list.  """
+
+        kwargs.setdefault('token', self.token)
+        return self.module.iter_call(*args, id_array=self, **kwargs)
 
     def filter(self, filters):
         """Filter selection again.
@@ -100,14 +156,72 @@ class Selection(tuple):
         """
 
         server_fields = [self.module.field(i) for i in fields]
+        store = entity_cache.CACHE
+        if store is not None:
+            return ResultSet(server_fields,
+                             self._get_rows_with_store(store, server_fields),
+                             self.module)
         resp = self.call("c_orm", "get_in_id",
                          sign_array=server_fields,
                          order_sign_array=server_fields)
         return ResultSet(server_fields, resp, self.module)
 
+    def _get_rows_with_store(self, store, server_fields):
+        """Get rows from entity cache, only fetch missing items from server.  """
+
+        database, module = self.module.database.name, self.module.name
+        rows = store.get_rows(database, module, self, server_fields)
+        missing = sorted(set(self).difference(rows))
+        if missing:
+            id_field = self.module.field('id')
+            fetch_fields = server_fields
+            if id_field not in fetch_fields:
+                fetch_fields = [id_field] + server_fields
+            id_index = fetch_fields.index(id_field)
+            select = Selection(self.module, *missing)
+            select.token = self.token
+            fetched_at = time.time()
+            resp = select.call("c_orm", "get_in_id",
+                               sign_array=fetch_fields,
+                               order_sign_array=fetch_fields)
+            store.set_rows(database, module, fetch_fields, resp, id_index,
+                           fetched_at)
+            offset = len(fetch_fields) - len(server_fields)
+            for i in resp:
+                rows[i[id_index]] = i[offset:]
+        # Same order as server, each item once.
+        ret = [rows[i] for i in set(self) if i in rows]
+        try:
+            ret.sort(key=_order_key({'sign_array': server_fields,
+                                     'order_sign_array': server_fields}))
+        except TypeError:
+            LOGGER.debug('Can not sort rows.', exc_info=True)
+        return ret
+
+    def iter_fields(self, *fields):
+        """Streaming version of `get_fields`.
+
+        Rows are yielded as soon as they are received,
+        memory usage will not grow with selection size.
+
+        Args:
+            *fields: Server defined field sign.
+
+        Yields:
+            list: Row with exactly same order with `fields`.
+        """
+
+        server_fields = [self.module.field(i) for i in fields]
+        return self.iter_call("c_orm", "get_in_id",
+                              sign_array=server_fields,
+                              order_sign_array=server_fields)
+
     def set_fields(self, **data):
         """Set field data for the selection.
 
+        When a `UnitOfWork` is active, data is recorded and
+        written on its commit.
+
         Args:
             **data: Field name as key, Value as value.
         """
@@ -115,6 +229,10 @@ class Selection(tuple):
         data = {
             self.module.field(k): v for k, v in data.items()
         }
+        uow = unitofwork.current()
+        if uow is not None:
+            uow.record(self, data)
+            return
         self.call("c_orm", "set_in_id",
                   sign_data_array=data)
 
@@ -154,7 +272,7 @@ class Selection(tuple):
         ret = set()
         for i in select[field]:
             try:
-                data = json.loads(i)
+                data = codec.loads(i)
                 assert isinstance(data, dict)
                 info = ImageInfo(max=data['max'][0],
                                  min=data['min'][0],
@@ -234,12 +352,76 @@ class Selection(tuple):
         from .entry import Entry
         return Entry(self.module, self[0])
 
-    def to_entries(self):
+    def to_entries(self, prefetch=()):
         """Convert selection to entries.
 
+        Args:
+            prefetch (Iterable[text_type], optional): Defaults to ().
+                Fields to fetch for all entries in one request,
+                entries will serve these fields without request again.
+
         Returns:
             tuple[Entry]: Entries.
         """
 
         from .entry import Entry
-        return tuple(Entry(self.module, i) for i in self)
+        ret = tuple(Entry(self.module, i) for i in self)
+        prefetch = [self.module.field(i) for i in prefetch]
+        if not prefetch:
+            return ret
+
+        rows = self.get_fields('id', *prefetch).index_by('id')
+        for entry in ret:
+            row = rows.get(entry[0])
+            if row is None:
+                # Item not found, let entry request it and fail as usual.
+                continue
+            entry.prefetched.update(zip(prefetch, row[1:]))
+        return ret
+
+
+def _sort_value(value):
+    # None can not compare with other types on Python 3.
+    return (0, '') if value is None else (1, value)
+
+
+def _order_key(kwargs):
+    """Row sort key for `order_sign_array`, None if not available.  """
+
+    fields = kwargs.get('sign_array')
+    order = kwargs.get('order_sign_array')
+    if not fields or not order:
+        return None
+    fields = list(fields)
+    try:
+        index = [fields.index(i) for i in order]
+    except ValueError:
+        return None
+    return lambda row: tuple(_sort_value(row[i]) for i in index)
+
+
+def _merge_results(results, key=None):
+    """Merge results of chunked call.
+
+    List results are merged by `key` if given,
+    each of them must already sorted by it.
+    Otherwise merged in chunk order.
+    """
+
+    if all(isinstance(i, list) for i in results):
+        if key is not None:
+            # Chunk index and row index make items unique,
+            # so rows are never compared.
+            decorated = [[(key(row), i, j, row) for j, row in enumerate(rows)]
+                         for i, rows in enumerate(results)]
+            try:
+                return [i[-1] for i in heapq.merge(*decorated)]
+            except TypeError:
+                LOGGER.debug('Can not merge by order key.', exc_info=True)
+        return [j for i in results for j in i]
+    if all(isinstance(i, dict) for i in results):
+        ret = {}
+        for i in results:
+            ret.update(i)
+        return ret
+    return results[-1]
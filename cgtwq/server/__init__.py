@@ -3,4 +3,4 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
-from .http import call
+from .http import call, iter_call
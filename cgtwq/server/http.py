@@ -3,17 +3,162 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
-import json
+import codecs
+import io
 import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque, namedtuple
 
 import requests
+from requests.adapters import HTTPAdapter
+from requests.utils import guess_json_utf
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.fields import RequestField
 
 from . import setting
-from .. import exceptions
+from .. import codec, exceptions
 
 LOGGER = logging.getLogger(__file__)
 SESSION = requests.Session()
 
+PoolStats = namedtuple('PoolStats', ('hits', 'misses'))
+
+
+class UploadStats(namedtuple('UploadStats', ('filename', 'size', 'seconds'))):
+    """Upload statistics, `size` is request body bytes.  """
+
+    @property
+    def speed(self):
+        """Bytes per second.  """
+
+        return self.size / self.seconds if self.seconds > 0 else float('inf')
+
+
+_UPLOAD_STATS = deque(maxlen=100)
+
+
+class _PoolCounter(object):
+    """Thread-safe connection pool hit/miss counter.  """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def count(self, is_hit):
+        """Count a connection checkout.  """
+
+        with self._lock:
+            if is_hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        """Current statistics.  """
+
+        with self._lock:
+            return PoolStats(hits=self.hits, misses=self.misses)
+
+    def reset(self):
+        """Reset all counters.  """
+
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+_POOL_COUNTER = _PoolCounter()
+
+
+class _CountingPoolMixin(object):
+    # pylint: disable=too-few-public-methods
+
+    def _get_conn(self, *args, **kwargs):
+        conn = super(_CountingPoolMixin, self)._get_conn(*args, **kwargs)
+        # Connection without socket will connect(again) before use.
+        _POOL_COUNTER.count(is_hit=getattr(conn, 'sock', None) is not None)
+        return conn
+
+
+class _CountingHTTPConnectionPool(_CountingPoolMixin, HTTPConnectionPool):
+    pass
+
+
+class _CountingHTTPSConnectionPool(_CountingPoolMixin, HTTPSConnectionPool):
+    pass
+
+
+class _PoolAdapter(HTTPAdapter):
+    """Http adapter that counts connection pool usage.  """
+
+    def init_poolmanager(self, *args, **kwargs):
+        # pylint: disable=arguments-differ
+        super(_PoolAdapter, self).init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool,
+        }
+
+
+def configure(pool_connections=None, pool_maxsize=None,
+              pool_block=None, keep_alive=None):
+    """Configure transport of the shared `SESSION`.
+
+    Arguments default to values in `setting`, given values are saved to it.
+
+    Args:
+        pool_connections (int, optional): Number of per-host pools to keep.
+        pool_maxsize (int, optional): Maximum connections kept for each host.
+        pool_block (bool, optional): If True, wait for a free connection
+            when pool is full, otherwise open a connection that will be
+            discarded after use.
+        keep_alive (bool, optional): Reuse connection between requests.
+    """
+
+    if pool_connections is not None:
+        setting.POOL_CONNECTIONS = pool_connections
+    if pool_maxsize is not None:
+        setting.POOL_MAXSIZE = pool_maxsize
+    if pool_block is not None:
+        setting.POOL_BLOCK = pool_block
+    if keep_alive is not None:
+        setting.KEEP_ALIVE = keep_alive
+
+    adapter = _PoolAdapter(pool_connections=setting.POOL_CONNECTIONS,
+                           pool_maxsize=setting.POOL_MAXSIZE,
+                           pool_block=setting.POOL_BLOCK)
+    for prefix in ('http://', 'https://'):
+        old = SESSION.adapters.get(prefix)
+        SESSION.mount(prefix, adapter)
+        if old is not None and old is not adapter:
+            old.close()
+    SESSION.headers['Connection'] = (
+        'keep-alive' if setting.KEEP_ALIVE else 'close')
+
+
+def pool_stats():
+    """Connection pool statistics since last reset.
+
+    Returns:
+        PoolStats: namedtuple for ('hits', 'misses'),
+            `misses` counts checkouts that had to open a new connection.
+    """
+
+    return _POOL_COUNTER.stats()
+
+
+def reset_pool_stats():
+    """Reset connection pool statistics.  """
+
+    _POOL_COUNTER.reset()
+
+
+configure()
+
 
 def _raise_error(result):
     if not isinstance(result, dict):
@@ -28,6 +173,25 @@ def _raise_error(result):
     raise ValueError(data)
 
 
+def _load_response(resp, log_prefix):
+    """Load server result from response, body only been decoded once.  """
+
+    content = resp.content
+    encoding = resp.encoding or guess_json_utf(content) or 'utf-8'
+    if codecs.lookup(encoding).name == 'utf-8':
+        # Json backend can load utf-8 bytes directly.
+        data = content
+    else:
+        data = content.decode(encoding, 'replace')
+    if LOGGER.isEnabledFor(logging.DEBUG):
+        text = data if data is not content else content.decode(
+            encoding, 'replace')
+        LOGGER.debug('%s: %s', log_prefix, text.strip())
+    json_ = codec.loads(data)
+    _raise_error(json_)
+    return json_.get('data', json_)
+
+
 def call(controller, method, token, ip=None, **data):
     data['controller'] = controller
     data['method'] = method
@@ -35,6 +199,15 @@ def call(controller, method, token, ip=None, **data):
     return post('api.php', data, token, ip)
 
 
+def iter_call(controller, method, token, ip=None, **data):
+    """Streaming version of `call`, for methods that return a list.  """
+
+    data['controller'] = controller
+    data['method'] = method
+
+    return iter_post('api.php', data, token, ip)
+
+
 def post(pathname, data, token, ip=None, **kwargs):
     """`POST` data to CGTeamWork server.
         pathname (str unicode): Pathname for http host.
@@ -55,15 +228,71 @@ def post(pathname, data, token, ip=None, **kwargs):
     cookies = {'token': token}
     LOGGER.debug('POST: %s: %s', pathname, data)
     if data is not None:
-        data = {'data': json.dumps(data)}
+        data = {'data': codec.dumps(data)}
     resp = SESSION.post('http://{}/{}'.format(ip, pathname.lstrip('\\/')),
                         data=data,
                         cookies=cookies,
                         **kwargs)
-    LOGGER.debug('RECV: %s', resp.text.strip())
-    json_ = resp.json()
-    _raise_error(json_)
-    return json_.get('data', json_)
+    return _load_response(resp, 'RECV')
+
+
+def _iter_text(resp):
+    decoder = codecs.getincrementaldecoder(
+        resp.encoding or 'utf-8')('replace')
+    for i in resp.iter_content(setting.STREAM_CHUNK_SIZE):
+        yield decoder.decode(i)
+    yield decoder.decode(b'', True)
+
+
+def iter_post(pathname, data, token, ip=None, **kwargs):
+    """Streaming version of `post`, for pathnames that return a list.
+
+    Response is parsed incrementally,
+    items are yielded as soon as they are received.
+
+    Args:
+        pathname (str unicode): Pathname for http host.
+        data: Data to post.
+        token (str unicode): User token.
+        ip (str unicode, optional): Defaults to None. If `ip` is None,
+            will use ip from setting.
+        **kwargs: kwargs for `requests.post`
+
+    Raises:
+        ValueError: When server returned data is not a list.
+
+    Yields:
+        Item of server execution result.
+    """
+    # pylint: disable=invalid-name
+
+    assert 'cookies' not in kwargs
+    assert 'data' not in kwargs
+    assert 'stream' not in kwargs
+
+    ip = ip or setting.SERVER_IP
+    cookies = {'token': token}
+    LOGGER.debug('POST: %s: %s', pathname, data)
+    if data is not None:
+        data = {'data': codec.dumps(data)}
+    resp = SESSION.post('http://{}/{}'.format(ip, pathname.lstrip('\\/')),
+                        data=data,
+                        cookies=cookies,
+                        stream=True,
+                        **kwargs)
+    try:
+        header = {}
+        count = 0
+        for i in codec.iter_items(_iter_text(resp), 'data', header):
+            count += 1
+            yield i
+        LOGGER.debug('RECV: %s, %d items', header, count)
+        _raise_error(header)
+        rest = header.get('data')
+        if rest:
+            raise ValueError('Server returned data is not a list.', rest)
+    finally:
+        resp.close()
 
 
 def get(pathname, token, ip=None, **kwargs):
@@ -87,7 +316,106 @@ def get(pathname, token, ip=None, **kwargs):
     resp = SESSION.get('http://{}/{}'.format(ip, pathname.lstrip('\\/')),
                        cookies=cookies,
                        **kwargs)
-    LOGGER.debug('GET: %s', resp.text.strip())
-    json_ = resp.json()
-    _raise_error(json_)
-    return json_.get('data', json_)
+    return _load_response(resp, 'GET')
+
+
+class _MultipartBody(object):
+    """File-like `multipart/form-data` request body.
+
+    File content is read in chunks no larger than `chunk_size`
+    when request is sending, so it never loaded into memory as a whole.
+    """
+
+    def __init__(self, fields, name, filename, fileobj, content_type=None,
+                 chunk_size=None):
+        boundary = uuid.uuid4().hex
+        self.content_type = 'multipart/form-data; boundary=' + boundary
+        self.chunk_size = chunk_size or setting.UPLOAD_CHUNK_SIZE
+
+        head = []
+        for key, value in fields.items():
+            field = RequestField(key, value)
+            field.make_multipart()
+            head.append('--{}\r\n{}{}\r\n'.format(
+                boundary, field.render_headers(), value).encode('utf-8'))
+        field = RequestField(name, b'', filename)
+        field.make_multipart(content_type=content_type)
+        head.append('--{}\r\n{}'.format(
+            boundary, field.render_headers()).encode('utf-8'))
+        head = b''.join(head)
+        tail = '\r\n--{}--\r\n'.format(boundary).encode('utf-8')
+
+        fileobj.seek(0, os.SEEK_END)
+        file_size = fileobj.tell()
+        fileobj.seek(0)
+        # `requests` use `len` attribute as `Content-Length`.
+        self.len = len(head) + file_size + len(tail)
+        self._parts = [io.BytesIO(head), fileobj, io.BytesIO(tail)]
+
+    def read(self, size=-1):
+        """Read at most `size` bytes, -1 means all rest bytes.  """
+
+        if size is None or size < 0:
+            return b''.join(iter(lambda: self.read(self.chunk_size), b''))
+        size = min(size, self.chunk_size)
+        while self._parts:
+            ret = self._parts[0].read(size)
+            if ret:
+                return ret
+            self._parts.pop(0)
+        return b''
+
+
+def post_file(pathname, data, token, fileobj, filename,
+              name='file', content_type=None, ip=None):
+    """`POST` data with a file to CGTeamWork server.
+
+    File is streamed with bounded memory, caller should close it.
+
+    Args:
+        pathname (str unicode): Pathname for http host.
+        data: Data to post.
+        token (str unicode): User token.
+        fileobj (file): Seekable binary file object to upload.
+        filename (str unicode): Filename send to server.
+        name (str unicode, optional): Defaults to 'file'. Form field name.
+        content_type (str unicode, optional): Defaults to None.
+            Mime type of the file.
+        ip (str unicode, optional): Defaults to None. If `ip` is None,
+            will use ip from setting.
+
+    Returns:
+        Server execution result.
+    """
+    # pylint: disable=invalid-name
+
+    ip = ip or setting.SERVER_IP
+    LOGGER.debug('POST FILE: %s: %s: %s', pathname, filename, data)
+    body = _MultipartBody({'data': codec.dumps(data)},
+                          name, filename, fileobj, content_type)
+    start = time.time()
+    resp = SESSION.post('http://{}/{}'.format(ip, pathname.lstrip('\\/')),
+                        data=body,
+                        headers={'Content-Type': body.content_type},
+                        cookies={'token': token})
+    stats = UploadStats(filename, body.len, time.time() - start)
+    _UPLOAD_STATS.append(stats)
+    LOGGER.debug('Uploaded: %s: %d bytes in %.3f seconds, %.0f bytes/s',
+                 filename, stats.size, stats.seconds, stats.speed)
+    return _load_response(resp, 'RECV')
+
+
+def upload_stats():
+    """Statistics of recent uploads.
+
+    Returns:
+        list[UploadStats]: Last 100 uploads, oldest first.
+    """
+
+    return list(_UPLOAD_STATS)
+
+
+def reset_upload_stats():
+    """Clear upload statistics.  """
+
+    _UPLOAD_STATS.clear()
@@ -3,3 +3,12 @@
 
 SERVER_IP = '192.168.55.11'
 DEFAULT_TOKEN = None
+
+# Http connection pool.
+POOL_CONNECTIONS = 10  # Number of per-host pools to keep.
+POOL_MAXSIZE = 32  # Maximum connections kept alive for each host.
+POOL_BLOCK = False  # Wait for a free connection instead of opening extra one.
+KEEP_ALIVE = True
+
+STREAM_CHUNK_SIZE = 64 * 1024  # Bytes read each time when streaming response.
+UPLOAD_CHUNK_SIZE = 64 * 1024  # Maximum bytes buffered each time when uploading.
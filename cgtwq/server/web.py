@@ -4,19 +4,108 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import hashlib
+import logging
 import mimetypes
 import os
+import threading
+from collections import OrderedDict
 
 from wlf.codectools import get_encoded as e
 from wlf.codectools import get_unicode as u
 
+from . import setting
+from .. import entity_cache, transcode
 from ..model import ImageInfo
-from .http import post
+from .http import post_file
+
+LOGGER = logging.getLogger(__name__)
+
+# Upload key as key, server response data as value,
+# least recently used first.
+_UPLOADED = OrderedDict()
+_UPLOADED_MAXSIZE = 1024
+_UPLOAD_LOCK = threading.Lock()
+# Upload key as key, (lock, user count) as value,
+# removed when no upload use it.
+_UPLOAD_KEY_LOCKS = {}
+
+
+def _file_hash(filename):
+    ret = hashlib.sha1()
+    with open(e(filename), 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            ret.update(chunk)
+    return ret.hexdigest()
+
+
+def _remember(key, data):
+    with _UPLOAD_LOCK:
+        _UPLOADED.pop(key, None)
+        _UPLOADED[key] = data
+        while len(_UPLOADED) > _UPLOADED_MAXSIZE:
+            _UPLOADED.popitem(last=False)
+
+
+def _get_uploaded(key):
+    with _UPLOAD_LOCK:
+        ret = _UPLOADED.pop(key, None)
+        if ret is not None:
+            # Re-insert to mark as recently used.
+            _UPLOADED[key] = ret
+            return ret
+    store = entity_cache.CACHE
+    if store is not None:
+        ret = store.get_upload(key)
+        if ret is not None:
+            _remember(key, ret)
+    return ret
+
+
+def _set_uploaded(key, data):
+    _remember(key, data)
+    store = entity_cache.CACHE
+    if store is not None:
+        store.set_upload(key, data)
+
+
+def _acquire_key_lock(key):
+    with _UPLOAD_LOCK:
+        lock, count = _UPLOAD_KEY_LOCKS.get(key, (None, 0))
+        lock = lock or threading.Lock()
+        _UPLOAD_KEY_LOCKS[key] = (lock, count + 1)
+    lock.acquire()
+    return lock
+
+
+def _release_key_lock(key, lock):
+    lock.release()
+    with _UPLOAD_LOCK:
+        current, count = _UPLOAD_KEY_LOCKS.get(key, (None, 0))
+        # Lock may already be removed by `clear_upload_cache`.
+        if current is not lock:
+            return
+        if count > 1:
+            _UPLOAD_KEY_LOCKS[key] = (lock, count - 1)
+        else:
+            del _UPLOAD_KEY_LOCKS[key]
+
+
+def clear_upload_cache():
+    """Forget uploaded images in memory, next upload will send file again.  """
+
+    with _UPLOAD_LOCK:
+        _UPLOADED.clear()
+        _UPLOAD_KEY_LOCKS.clear()
 
 
 def upload_image(filename, folder, token):
     """Upload image to server.
 
+    Same file content is only uploaded once for each server folder,
+    result is remembered in memory(recent `_UPLOADED_MAXSIZE` files),
+    and in `entity_cache` when enabled.
+
     Args:
         filename (str): Filename.
         folder (str): Server upload folder, usually same with project name.
@@ -27,16 +116,41 @@ def upload_image(filename, folder, token):
     """
 
     filename = u(filename)
-    basename = os.path.basename(filename)
-    data = post('web_upload_file',
-                {'folder': folder,
-                 'type': 'project',
-                 'method': 'convert_image',
-                 'filename': basename},
-                token=token,
-                files={'file':
-                       (basename, open(e(filename), 'rb'),
-                        mimetypes.guess_type(basename)[0])})
+    key = '{}|{}|{}'.format(setting.SERVER_IP, folder, _file_hash(filename))
+    lock = _acquire_key_lock(key)
+    try:
+        data = _get_uploaded(key)
+        if data is None:
+            data = _upload_image(filename, folder, token)
+            _set_uploaded(key, data)
+        else:
+            LOGGER.debug('Reuse uploaded image: %s', filename)
+    finally:
+        _release_key_lock(key, lock)
+    return ImageInfo(path=filename, **data)
+
+
+def _upload_image(filename, folder, token):
+    transcoder = transcode.TRANSCODER
+    if transcoder is None:
+        return _post_image(e(filename), os.path.basename(filename),
+                           folder, token)
+    with transcoder.transcoded(e(filename)) as path:
+        basename = os.path.basename(filename)
+        if path != e(filename):
+            basename = os.path.splitext(basename)[0] + '.jpg'
+        return _post_image(path, basename, folder, token)
+
+
+def _post_image(path, basename, folder, token):
+    with open(path, 'rb') as f:
+        data = post_file('web_upload_file',
+                         {'folder': folder,
+                          'type': 'project',
+                          'method': 'convert_image',
+                          'filename': basename},
+                         token, f, basename,
+                         content_type=mimetypes.guess_type(basename)[0])
     assert isinstance(data, dict), type(data)
-    data['path'] = filename
-    return ImageInfo(**data)
+    data.pop('path', None)
+    return data
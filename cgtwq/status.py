@@ -1,7 +1,7 @@
 # -*- coding=UTF-8 -*-
 """Get status from server."""
 
-from . import server
+from . import cache, server
 
 from .model import StatusInfo
 
@@ -14,6 +14,6 @@ def get_all():
     """
 
     token = server.setting.DEFAULT_TOKEN
-    resp = server.call('c_status', 'get_all', token=token,
-                       field_array=StatusInfo._fields)
+    resp = cache.cached_call(server.call, 'c_status', 'get_all', token=token,
+                             field_array=StatusInfo._fields)
     return tuple(StatusInfo(*i) for i in resp)
@@ -0,0 +1,221 @@
+# -*- coding=UTF-8 -*-
+"""Downsize images before upload.
+
+Server converts uploaded image to its own `max` and `min` version,
+so sending a smaller image gives same result with less bandwidth.
+Disabled by default, use `enable` to turn it on.
+
+Backends are tried in order: `Qt` (`Qt.py`), `PIL`.
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import contextlib
+import importlib
+import logging
+import os
+import tempfile
+import threading
+import uuid
+from collections import namedtuple
+
+from . import filetools
+
+LOGGER = logging.getLogger(__name__)
+
+BACKEND_NAMES = ('Qt', 'PIL')
+
+# Jpeg has no alpha channel,
+# transparent area is composited on this color.
+BACKGROUND = (255, 255, 255)
+
+
+class TranscodeStats(namedtuple('TranscodeStats',
+                                ('count', 'source_size', 'size'))):
+    """Transcode statistics, sizes are in bytes.  """
+
+    @property
+    def saved(self):
+        """Bytes not need to upload.  """
+
+        return self.source_size - self.size
+
+
+def _transcode_qt(src, dst, max_size, quality):
+    from Qt.QtCore import Qt
+    from Qt.QtGui import QColor, QImage, QPainter
+
+    image = QImage(src)
+    if image.isNull():
+        raise ValueError('Can not read image.', src)
+    if max(image.width(), image.height()) > max_size:
+        image = image.scaled(max_size, max_size,
+                             Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    if image.hasAlphaChannel():
+        background = QImage(image.size(), QImage.Format_RGB32)
+        background.fill(QColor(*BACKGROUND))
+        painter = QPainter(background)
+        painter.drawImage(0, 0, image)
+        painter.end()
+        image = background
+    if not image.save(dst, 'JPG', quality):
+        raise ValueError('Can not save image.', dst)
+
+
+def _transcode_pil(src, dst, max_size, quality):
+    from PIL import Image
+
+    image = Image.open(src)
+    try:
+        image.thumbnail((max_size, max_size))
+        if (image.getbands()[-1] in ('A', 'a')
+                or 'transparency' in image.info):
+            rgba = image.convert('RGBA')
+            result = Image.new('RGB', rgba.size, BACKGROUND)
+            result.paste(rgba, mask=rgba.getchannel('A'))
+        else:
+            result = image.convert('RGB')
+        result.save(dst, 'JPEG', quality=quality)
+    finally:
+        image.close()
+
+
+_BACKENDS = {
+    'Qt': ('Qt.QtGui', _transcode_qt),
+    'PIL': ('PIL.Image', _transcode_pil),
+}
+
+
+class Transcoder(object):
+    """Image transcoder that record saved bandwidth.  """
+
+    def __init__(self, max_size=1920, quality=90, backend=None):
+        """
+        Args:
+            max_size (int, optional): Defaults to 1920.
+                Longest side in pixels, larger image will be downsized.
+            quality (int, optional): Defaults to 90. Jpeg quality.
+            backend (text_type or callable, optional): Defaults to None.
+                Backend name in `BACKEND_NAMES`,
+                or function that takes (src, dst, max_size, quality).
+                If `backend` is None, will use first installed backend.
+
+        Raises:
+            ImportError: When no backend installed.
+        """
+
+        self.max_size = max_size
+        self.quality = quality
+        self.func = backend if callable(backend) else _get_backend(backend)
+        self.tempdir = os.path.join(tempfile.gettempdir(), 'cgtwq-transcode')
+        self._lock = threading.Lock()
+        self._stats = TranscodeStats(0, 0, 0)
+
+    def stats(self):
+        """Transcode statistics.
+
+        Returns:
+            TranscodeStats: namedtuple for ('count', 'source_size', 'size').
+        """
+
+        with self._lock:
+            return self._stats
+
+    def _record(self, source_size, size):
+        with self._lock:
+            count, total_source_size, total_size = self._stats
+            self._stats = TranscodeStats(count + 1,
+                                         total_source_size + source_size,
+                                         total_size + size)
+
+    @contextlib.contextmanager
+    def transcoded(self, filename):
+        """Context for a temporary transcoded file.
+
+        Source file is used when transcode failed
+        or result is not smaller than source.
+
+        Args:
+            filename (str): Source image filename.
+
+        Yields:
+            str: Filename to upload,
+                temporary file will be removed on exit.
+        """
+
+        filetools.makedirs(self.tempdir)
+        dst = os.path.join(self.tempdir, uuid.uuid4().hex + '.jpg')
+        source_size = os.path.getsize(filename)
+        ret = filename
+        try:
+            try:
+                self.func(filename, dst, self.max_size, self.quality)
+                if os.path.getsize(dst) < source_size:
+                    ret = dst
+            except (IOError, OSError, ValueError):
+                LOGGER.debug('Transcode failed: %s', filename, exc_info=True)
+            size = os.path.getsize(ret)
+            self._record(source_size, size)
+            LOGGER.debug('Transcoded: %s: %d -> %d bytes',
+                         filename, source_size, size)
+            yield ret
+        finally:
+            if os.path.exists(dst):
+                os.remove(dst)
+
+
+def _get_backend(name=None):
+    for i in ((name,) if name else BACKEND_NAMES):
+        module, func = _BACKENDS[i]
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            LOGGER.debug('Transcode backend not installed: %s', i)
+            continue
+        return func
+    raise ImportError('No image transcode backend installed.', BACKEND_NAMES)
+
+
+TRANSCODER = None
+
+
+def enable(max_size=1920, quality=90, backend=None):
+    """Enable transcode before image upload.
+
+    Args:
+        max_size (int, optional): Defaults to 1920.
+            Longest side in pixels, larger image will be downsized.
+        quality (int, optional): Defaults to 90. Jpeg quality.
+        backend (text_type or callable, optional): Defaults to None.
+            Backend name or transcode function.
+
+    Raises:
+        ImportError: When no backend installed.
+
+    Returns:
+        Transcoder: Enabled transcoder.
+    """
+
+    global TRANSCODER  # pylint: disable=global-statement
+    TRANSCODER = Transcoder(max_size, quality, backend)
+    return TRANSCODER
+
+
+def disable():
+    """Disable transcode.  """
+
+    global TRANSCODER  # pylint: disable=global-statement
+    TRANSCODER = None
+
+
+def stats():
+    """Statistics of current transcoder.
+
+    Returns:
+        TranscodeStats: namedtuple for ('count', 'source_size', 'size').
+    """
+
+    if TRANSCODER is None:
+        return TranscodeStats(0, 0, 0)
+    return TRANSCODER.stats()
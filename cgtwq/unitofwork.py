@@ -0,0 +1,178 @@
+# -*- coding=UTF-8 -*-
+"""Record field changes and write them in grouped requests.  """
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import logging
+import threading
+from collections import OrderedDict
+
+from . import codec, parallel
+
+LOGGER = logging.getLogger(__name__)
+
+_LOCAL = threading.local()
+
+
+def current():
+    """Active unit of work of current thread.
+
+    Returns:
+        UnitOfWork or None: Innermost active unit of work.
+    """
+
+    stack = getattr(_LOCAL, 'stack', None)
+    return stack[-1] if stack else None
+
+
+def group_by_payload(changes):
+    """Group items that receive identical data.
+
+    Args:
+        changes (dict): Item id as key, field data dict as value.
+
+    Returns:
+        list[tuple[dict, list]]: (data, id list) for each group,
+            in first appearance order.
+    """
+
+    groups = OrderedDict()
+    for id_, data in changes.items():
+        key = codec.dumps(data, sort_keys=True)
+        groups.setdefault(key, (data, []))[1].append(id_)
+    return list(groups.values())
+
+
+class UnitOfWork(object):
+    """Collect `Selection.set_fields` calls then write them together.
+
+    Used as context manager, all field assignments in current thread
+    are recorded instead of sent, and commit on exit without error:
+
+    >>> with UnitOfWork():
+    ...     entry['status'] = 'Approve'
+    ...     selection['artist'] = 'unity'
+
+    Assignment that equals to last known value is skipped,
+    items that have identical changes are written in one request,
+    different requests are sent concurrently.
+    """
+
+    def __init__(self, workers=None):
+        """
+        Args:
+            workers (int, optional): Defaults to None.
+                Maximum concurrent requests on commit.
+        """
+
+        self.workers = workers
+        # (database, module, module_type, token) as key.
+        self._modules = {}
+        self._pending = {}
+        self._known = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        if not hasattr(_LOCAL, 'stack'):
+            _LOCAL.stack = []
+        _LOCAL.stack.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _LOCAL.stack.remove(self)
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+    def __len__(self):
+        """Count of items that has pending change.  """
+
+        return sum(len(i) for i in self._pending.values())
+
+    @staticmethod
+    def _key(selection):
+        module = selection.module
+        return (module.database.name, module.name, module.module_type,
+                selection.token)
+
+    def record(self, selection, data):
+        """Record field data for the selection.
+
+        Args:
+            selection (Selection): Items to change.
+            data (dict): Server field name as key, value as value.
+        """
+
+        key = self._key(selection)
+        prefetched = getattr(selection, 'prefetched', {})
+        with self._lock:
+            self._modules.setdefault(key, selection.module)
+            pending = self._pending.setdefault(key, {})
+            known = self._known.setdefault(key, {})
+            for field, value in data.items():
+                known_values = known.setdefault(field, {})
+                if field in prefetched:
+                    known_values.setdefault(selection[0], prefetched[field])
+                for id_ in selection:
+                    if (id_ in known_values
+                            and known_values[id_] == value):
+                        LOGGER.debug('Skip unchanged: %s: %s', id_, field)
+                        pending.get(id_, {}).pop(field, None)
+                        continue
+                    pending.setdefault(id_, {})[field] = value
+                    prefetched.pop(field, None)
+            for id_ in selection:
+                if id_ in pending and not pending[id_]:
+                    del pending[id_]
+
+    def commit(self):
+        """Write recorded changes to server.
+
+        Changes that failed to write are kept for next commit.
+
+        Raises:
+            Exception: First exception raised by requests.
+        """
+
+        with self._lock:
+            tasks = []
+            for key, changes in self._pending.items():
+                module = self._modules[key]
+                for data, id_list in group_by_payload(changes):
+                    tasks.append((key, module, data, tuple(id_list)))
+            self._pending = {}
+
+        def _write(index):
+            key, module, data, id_list = tasks[index]
+            select = module.select(*id_list)
+            select.token = key[-1]
+            select.call('c_orm', 'set_in_id', sign_data_array=data)
+
+        LOGGER.debug('Commit %d requests', len(tasks))
+        result = parallel.settle(_write, range(len(tasks)), self.workers)
+
+        with self._lock:
+            for index in result.results:
+                key, _, data, id_list = tasks[index]
+                known = self._known.setdefault(key, {})
+                for field, value in data.items():
+                    known.setdefault(field, {}).update(
+                        (i, value) for i in id_list)
+            for index in sorted(result.errors):
+                key, _, data, id_list = tasks[index]
+                pending = self._pending.setdefault(key, {})
+                for id_ in id_list:
+                    # Keep newer value recorded during commit.
+                    changes = dict(data)
+                    changes.update(pending.get(id_, {}))
+                    pending[id_] = changes
+        if result.errors:
+            raise result.errors[min(result.errors)]
+
+    def rollback(self):
+        """Discard recorded changes.  """
+
+        with self._lock:
+            self._pending = {}
@@ -0,0 +1,79 @@
+# -*- coding=UTF-8 -*-
+"""Benchmark response loading of `cgtwq.server.http` on large payloads.
+
+Run with `python tests/benchmark_server_http.py`.
+"""
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import json
+import timeit
+
+import requests
+
+from cgtwq.server import http
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None  # pylint: disable=invalid-name
+
+
+def _payload(rows):
+    data = [['{:06d}'.format(i), '镜头_{}'.format(i), 'Approve', '备注 ' * 20]
+            for i in range(rows)]
+    return json.dumps({'code': '1', 'type': 'json', 'data': data},
+                      ensure_ascii=False).encode('utf-8')
+
+
+def _response(content, encoding):
+    resp = requests.models.Response()
+    resp.status_code = 200
+    resp._content = content  # pylint: disable=protected-access
+    resp.encoding = encoding
+    return resp
+
+
+def _legacy_load(resp):
+    """Response handling before lazy decoding.  """
+
+    http.LOGGER.debug('RECV: %s', resp.text.strip())
+    json_ = resp.json()
+    return json_.get('data', json_)
+
+
+def _current_load(resp):
+    return http._load_response(resp, 'RECV')  # pylint: disable=protected-access
+
+
+def _peak_memory(func, resp):
+    if tracemalloc is None:
+        return float('nan')
+    tracemalloc.start()
+    func(resp)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 2.0**20
+
+
+def main():
+    """Print benchmark result.  """
+
+    for rows in (10000, 50000):
+        content = _payload(rows)
+        for encoding in ('utf-8', None):
+            resp = _response(content, encoding)
+            number = 1 if encoding is None else 5
+            print('{:.1f}MB body, encoding={}:'.format(
+                len(content) / 2.0**20, encoding))
+            for name, func in (('legacy', _legacy_load),
+                               ('current', _current_load)):
+                cost = min(timeit.repeat(lambda: func(resp),  # pylint: disable=cell-var-from-loop
+                                         repeat=3, number=number)) / number
+                print('    {:8s}{:8.1f}ms  peak {:6.1f}MB'.format(
+                    name, cost * 1000, _peak_memory(func, resp)))
+
+
+if __name__ == '__main__':
+    main()
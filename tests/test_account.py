@@ -8,10 +8,16 @@ import os
 import uuid
 
 import pytest
+import six
 
 import cgtwq.account
 import util
 
+if six.PY3:
+    from unittest.mock import patch  # pylint: disable=import-error,no-name-in-module
+else:
+    from mock import patch  # pylint: disable=import-error,no-name-in-module
+
 
 @util.skip_if_not_logged_in
 @pytest.mark.skipif(not (os.getenv('CGTWQ_TEST_ACCOUNT') and os.getenv('CGTWQ_TEST_PASSWORD')),
@@ -27,3 +33,47 @@ def test_login_fail():
         cgtwq.account.login(uuid.uuid4().hex, '')
     with pytest.raises(cgtwq.PasswordError):
         cgtwq.account.login('admin', uuid.uuid4().hex)
+
+
+@pytest.fixture(name='server_call')
+def _server_call():
+    cgtwq.account.invalidate()
+    with patch('cgtwq.server.call') as call:
+        yield call
+    cgtwq.account.invalidate()
+
+
+def test_identity_cache(server_call):
+    server_call.return_value = 'account_id'
+    for _ in range(3):
+        assert cgtwq.account.get_account_id('token') == 'account_id'
+    server_call.assert_called_once_with(
+        'c_token', 'get_account_id', token='token')
+    server_call.return_value = 'account'
+    assert cgtwq.account.get_account('token') == 'account'
+    assert cgtwq.account.get_account_id('token') == 'account_id'
+    assert server_call.call_count == 2
+
+    # Manually invalidated.
+    cgtwq.account.invalidate('token')
+    server_call.return_value = 'account_id2'
+    assert cgtwq.account.get_account_id('token') == 'account_id2'
+
+    # Invalidated by login error.
+    server_call.side_effect = cgtwq.LoginError
+    with pytest.raises(cgtwq.LoginError):
+        cgtwq.account.get_account('token')
+    with pytest.raises(cgtwq.LoginError):
+        cgtwq.account.get_account_id('token')
+
+
+def test_login_cache(server_call):
+    server_call.return_value = {'account': 'account',
+                                'account_id': 'account_id',
+                                'token': 'token'}
+    info = cgtwq.account.login('account', 'password')
+    assert cgtwq.account.get_account_info('token') == info
+    assert cgtwq.account.get_account('token') == 'account'
+    assert cgtwq.account.get_account_id('token') == 'account_id'
+    assert server_call.call_count == 1
+    assert cgtwq.account.get_account_info('other') is None
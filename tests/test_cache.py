@@ -0,0 +1,129 @@
+# -*- coding=UTF-8 -*-
+"""Test module `cgtwq.cache`.  """
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import threading
+from unittest import TestCase, main
+
+import six
+
+import cgtwq
+from cgtwq import cache
+
+if six.PY3:
+    from unittest.mock import patch  # pylint: disable=import-error,no-name-in-module
+else:
+    from mock import patch  # pylint: disable=import-error,no-name-in-module
+
+
+class QueryCacheTestCase(TestCase):
+    def setUp(self):
+        patcher = patch('cgtwq.server.call')
+        self.addCleanup(patcher.stop)
+        self.call_method = patcher.start()
+        self.call_method.side_effect = lambda *args, **kwargs: [
+            [i] + ['value'] * (len(kwargs.get('sign_array', ())) - 1)
+            for i in kwargs['id_array']]
+
+        self.addCleanup(cache.disable)
+        self.cache = cache.enable(maxsize=3, ttl=60)
+        self.module = cgtwq.Database('dummy_db')['shot']
+
+    def test_read_through(self):
+        select = self.module.select('1', '2')
+        self.assertEqual(select.get_fields('id', 'artist'),
+                         [['1', 'value'], ['2', 'value']])
+        select.get_fields('id', 'artist')
+        self.assertEqual(self.call_method.call_count, 1)
+        self.assertEqual(cache.stats(), cache.CacheStats(1, 1, 1))
+
+        # Different argument.
+        select.get_fields('id', 'status')
+        self.assertEqual(self.call_method.call_count, 2)
+
+    def test_invalidate(self):
+        select = self.module.select('1', '2')
+        other = self.module.select('3')
+        select.get_fields('id', 'artist')
+        other.get_fields('id', 'artist')
+        self.assertEqual(self.call_method.call_count, 2)
+
+        self.module.select('2').set_fields(artist='Monika')
+        self.assertEqual(len(self.cache), 1)
+        select.get_fields('id', 'artist')
+        other.get_fields('id', 'artist')
+        self.assertEqual(self.call_method.call_count, 4)
+
+        self.module.select('3').delete()
+        other.get_fields('id', 'artist')
+        self.assertEqual(self.call_method.call_count, 6)
+
+        # Other module not affected.
+        self.module.database['asset'].select('1').delete()
+        select.get_fields('id', 'artist')
+        self.assertEqual(self.call_method.call_count, 7)
+
+    def test_concurrent_write(self):
+        artist = {'1': 'old'}
+        started = threading.Event()
+        release = threading.Event()
+
+        def _server(*args, **kwargs):
+            if args[1] == 'set_in_id':
+                artist['1'] = kwargs['sign_data_array']['task.artist']
+                return True
+            ret = [[i, artist[i]] for i in kwargs['id_array']]
+            if not started.is_set():
+                # Respond with data read before the write.
+                started.set()
+                release.wait(10)
+            return ret
+        self.call_method.side_effect = _server
+        select = self.module.select('1')
+
+        # Read started before the write, finished after it.
+        thread = threading.Thread(
+            target=select.get_fields, args=('id', 'artist'))
+        thread.start()
+        started.wait(10)
+        select.set_fields(artist='new')
+        release.set()
+        thread.join()
+        self.assertEqual(select.get_fields('id', 'artist'), [['1', 'new']])
+
+        # Read started and finished while a write is running.
+        self.cache.clear()
+        self.cache.begin_write('dummy_db', 'shot')
+        select.get_fields('id', 'artist')
+        self.cache.end_write('dummy_db', 'shot')
+        self.assertEqual(len(self.cache), 0)
+        select.get_fields('id', 'artist')
+        self.assertEqual(len(self.cache), 1)
+
+    def test_lru_and_ttl(self):
+        for i in '1234':
+            self.module.select(i).get_fields('id')
+        self.assertEqual(len(self.cache), 3)
+        self.module.select('2').get_fields('id')
+        self.assertEqual(self.call_method.call_count, 4)
+        self.module.select('1').get_fields('id')
+        self.assertEqual(self.call_method.call_count, 5)
+
+        self.cache.ttl = -1
+        self.module.select('5').get_fields('id')
+        self.module.select('5').get_fields('id')
+        self.assertEqual(self.call_method.call_count, 7)
+
+    def test_disabled(self):
+        cache.disable()
+        select = self.module.select('1')
+        select.get_fields('id')
+        select.get_fields('id')
+        self.assertEqual(self.call_method.call_count, 2)
+        self.assertEqual(cache.stats(), cache.CacheStats(0, 0, 0))
+
+
+if __name__ == '__main__':
+    main()
@@ -4,14 +4,20 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import itertools
 import json
 import os
+import shutil
 import socket
+import tempfile
+import threading
+import time
 import uuid
 from functools import partial
 from unittest import TestCase, main, skip
 
 import six
+import websocket
 
 import cgtwq
 
@@ -240,5 +246,125 @@ class DesktopClientTestCase(TestCase):
         )
 
 
+class KeepAliveTestCase(TestCase):
+    def setUp(self):
+        patcher = patch('cgtwq.client.create_connection')
+        self.addCleanup(patcher.stop)
+        self.create_connection = patcher.start()
+        self.conn = self.create_connection.return_value
+        self.conn.recv.return_value = server_dumps(1, True)
+
+        patcher = patch.object(cgtwq.DesktopClient, 'keep_alive', True)
+        self.addCleanup(patcher.stop)
+        patcher.start()
+        self.addCleanup(cgtwq.DesktopClient.close)
+
+    def test_reuse(self):
+        for _ in range(3):
+            cgtwq.DesktopClient.refresh('proj_big', 'shot')
+        self.create_connection.assert_called_once()
+        self.assertEqual(self.conn.send.call_count, 3)
+        self.conn.close.assert_not_called()
+
+        cgtwq.DesktopClient.close()
+        self.conn.close.assert_called_once()
+        cgtwq.DesktopClient.refresh('proj_big', 'shot')
+        self.assertEqual(self.create_connection.call_count, 2)
+
+    def test_reconnect(self):
+        conn = self.conn
+        cgtwq.DesktopClient.refresh('proj_big', 'shot')
+
+        # Connection closed by client.
+        conn.send.side_effect = [
+            websocket.WebSocketConnectionClosedException, None]
+        cgtwq.DesktopClient.refresh('proj_big', 'shot')
+        self.assertEqual(self.create_connection.call_count, 2)
+        self.assertEqual(conn.send.call_count, 3)
+
+        # Connection dropped after timeout.
+        conn.send.side_effect = None
+        conn.recv.side_effect = socket.timeout
+        self.assertIs(cgtwq.DesktopClient.is_running(), False)
+        conn.recv.side_effect = None
+        cgtwq.DesktopClient.refresh('proj_big', 'shot')
+        self.assertEqual(self.create_connection.call_count, 3)
+
+
+class CacheTestCase(TestCase):
+    def setUp(self):
+        patcher = patch.dict(cgtwq.DesktopClient.cache, clear=True)
+        self.addCleanup(patcher.stop)
+        patcher.start()
+        self.counter = itertools.count()
+
+    def _slow_func(self):
+        time.sleep(0.1)
+        return next(self.counter)
+
+    def test_single_flight(self):
+        # pylint: disable=protected-access
+        client = cgtwq.DesktopClient
+        results = []
+        threads = [threading.Thread(
+            target=lambda: results.append(
+                client._cached('test', self._slow_func, 2)))
+            for _ in range(8)]
+        for i in threads:
+            i.start()
+        for i in threads:
+            i.join()
+        self.assertEqual(results, [0] * 8)
+
+        # Force refresh.
+        self.assertEqual(client._cached('test', self._slow_func, -1), 1)
+        self.assertEqual(client._cached('test', self._slow_func, 2), 1)
+
+    @patch.object(cgtwq.DesktopClient, 'stale_age', 60)
+    def test_stale(self):
+        # pylint: disable=protected-access
+        client = cgtwq.DesktopClient
+        self.assertEqual(client._cached('test', self._slow_func, 2), 0)
+        client.cache['test'] = (0, time.time() - 10)
+        self.assertEqual(client._cached('test', self._slow_func, 2), 0)
+        time.sleep(0.3)
+        self.assertEqual(client._cached('test', self._slow_func, 2), 1)
+
+        # Too old.
+        client.cache['test'] = (1, time.time() - 100)
+        self.assertEqual(client._cached('test', self._slow_func, 2), 2)
+
+    def test_shared(self):
+        # pylint: disable=protected-access
+        client = cgtwq.DesktopClient
+        tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempdir)
+        path = os.path.join(tempdir, 'sub', 'client_cache.json')
+        patcher = patch.object(client, 'shared_cache_path', path)
+        self.addCleanup(patcher.stop)
+        patcher.start()
+
+        self.assertEqual(client._cached('test', self._slow_func, 2), 0)
+        self.assertTrue(os.path.exists(path))
+        self.assertEqual(os.listdir(os.path.dirname(path)),
+                         ['client_cache.json'])
+        if os.name == 'posix':
+            # Only owner can read credentials.
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+
+        # Other process has no memory cache.
+        client.cache.clear()
+        self.assertEqual(client._cached('test', self._slow_func, 2), 0)
+        self.assertEqual(client._cached('test', self._slow_func, -1), 1)
+        client.cache.clear()
+        self.assertEqual(client._cached('test', self._slow_func, 2), 1)
+
+        # Broken file.
+        with open(path, 'w') as f:
+            f.write('{')
+        client.cache.clear()
+        self.assertEqual(client._cached('test', self._slow_func, 2), 2)
+
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,99 @@
+# -*- coding=UTF-8 -*-
+"""Test module `cgtwq.codec`.  """
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import importlib
+import json
+
+import pytest
+
+import cgtwq
+from cgtwq import codec
+
+
+def _installed(name):
+    try:
+        importlib.import_module(name)
+        return True
+    except ImportError:
+        return False
+
+
+@pytest.fixture(name='backend',
+                params=[i for i in codec.BACKEND_NAMES if _installed(i)])
+def _backend(request):
+    last = codec.BACKEND
+    yield codec.use(request.param)
+    codec.BACKEND = last
+
+
+def test_roundtrip(backend):
+    assert codec.BACKEND is backend
+    data = {'b': ['1', 2, None, True], 'a': '测试/text'}
+    result = codec.dumps(data)
+    assert json.loads(result) == data
+    assert codec.loads(result) == data
+    assert codec.loads(result.encode('utf-8')) == data
+    assert codec.dumps(data, sort_keys=True).startswith('{"a"')
+
+
+def test_tuple_subclass(backend):
+    # pylint: disable=unused-argument
+    select = cgtwq.Selection(cgtwq.Database('dummy_db')['shot'], '1', '2')
+    assert json.loads(codec.dumps({'id_array': select})) == {
+        'id_array': ['1', '2']}
+    image = cgtwq.model.ImageInfo('max', 'min')
+    assert json.loads(codec.dumps(image)) == ['max', 'min', None]
+
+
+def test_errors(backend):
+    # pylint: disable=unused-argument
+    with pytest.raises(TypeError):
+        codec.loads(None)
+    with pytest.raises(ValueError):
+        codec.loads('not json')
+    with pytest.raises(ValueError):
+        codec.loads('')
+
+
+def test_indent():
+    data = {'method': 'get_token', 'type': 'get'}
+    assert (codec.dumps(data, indent=4, sort_keys=True)
+            == json.dumps(data, indent=4, sort_keys=True))
+
+
+def _chunks(text, size):
+    return (text[i:i + size] for i in range(0, len(text), size))
+
+
+def test_iter_items():
+    data = [['1', '镜头', 12345], ['2', None, -1.5e3], [], {'a': [1, ']']}]
+    text = json.dumps({'code': '1', 'data': data, 'type': 'json'}, indent=2)
+    for size in (1, 3, 7, len(text)):
+        header = {}
+        result = list(codec.iter_items(_chunks(text, size), 'data', header))
+        assert result == data
+        assert header == {'code': '1', 'type': 'json'}
+
+    header = {}
+    text = '{"code": "2", "type": "msg", "data": "please login!!!"}'
+    assert list(codec.iter_items(_chunks(text, 4), 'data', header)) == []
+    assert header == {'code': '2', 'type': 'msg', 'data': 'please login!!!'}
+
+    # Chunk boundary inside a number.
+    for chunks, expected in (
+            (['{"data": [1.', '5, 2]}'], [1.5, 2]),
+            (['{"data": [1e', '3]}'], [1e3]),
+            (['{"data": [1e-', '3]}'], [1e-3]),
+            (['{"data": [1', '0', ' ', ', 2]}'], [10, 2]),
+    ):
+        assert list(codec.iter_items(chunks, 'data', {})) == expected
+
+    assert list(codec.iter_items(['{"data": [ ]}'], 'data', {})) == []
+    assert list(codec.iter_items(['{}'], 'data', {})) == []
+    with pytest.raises(ValueError):
+        list(codec.iter_items(_chunks('{"data": [1, 2', 2), 'data', {}))
+    with pytest.raises(ValueError):
+        list(codec.iter_items(['[1, 2]'], 'data', {}))
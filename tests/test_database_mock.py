@@ -4,6 +4,7 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import time
 from unittest import TestCase, main
 
 import six
@@ -66,6 +67,134 @@ class ModuleTestCase(TestCase):
                                   token=select.token)
         self.assertIsInstance(select, cgtwq.Selection)
 
+    def test_query(self):
+        module = self.module
+        method = self.call_method
+        method.return_value = [['1', 'shot_a'], ['2', 'shot_b']]
+
+        result = module.query(cgtwq.Filter('key', 'value'), 'shot.shot')
+        method.assert_called_once_with(
+            'c_orm', 'get_with_filter',
+            db='dummy_db',
+            module='shot',
+            module_type='task',
+            sign_array=['task.id', 'shot.shot'],
+            sign_filter_array=[['task.key', '=', 'value']],
+            order_sign_array=['task.id', 'shot.shot'],
+            token=module.token)
+        self.assertIsInstance(result, cgtwq.ResultSet)
+        self.assertEqual(result.column('shot.shot'), ('shot_a', 'shot_b'))
+        select = result.to_selection()
+        self.assertIsInstance(select, cgtwq.Selection)
+        self.assertEqual(select, ('1', '2'))
+
+        method.return_value = []
+        result = module.query(cgtwq.Filter('key', 'value'), 'id')
+        self.assertEqual(len(result), 0)
+        self.assertRaises(ValueError, result.to_selection)
+
+    def test_set_many(self):
+        module = self.module
+        method = self.call_method
+
+        def _side_effect(*args, **kwargs):
+            # pylint: disable=unused-argument
+            if '4' in kwargs['id_array']:
+                raise cgtwq.PermissionError
+            return True
+        method.side_effect = _side_effect
+        progress = []
+        result = module.set_many({
+            '1': {'first': 1001, 'last': 1100},
+            '2': {'last': 1100, 'first': 1001},
+            '3': {'first': 1001},
+            '4': {'first': 1},
+            '5': {},
+        }, callback=lambda *args: progress.append(args))
+        self.assertEqual(result.results, {('1', '2'): True, ('3',): True})
+        self.assertEqual(list(result.errors), [('4',)])
+        self.assertIsInstance(result.errors[('4',)], cgtwq.PermissionError)
+        self.assertEqual(sorted(progress), [(1, 3), (2, 3), (3, 3)])
+        self.assertEqual(method.call_count, 3)
+        method.assert_any_call(
+            'c_orm', 'set_in_id',
+            db='dummy_db',
+            module='shot',
+            module_type='task',
+            id_array=('1', '2'),
+            sign_data_array={'task.first': 1001, 'task.last': 1100},
+            token=module.token)
+
+    def test_get_history(self):
+        module = self.module
+        method = self.call_method
+        text = ('{"data": "note", "image": '
+                '[{"max": "max.jpg", "min": "min.jpg", "path": "a.png"}]}')
+        method.return_value = [
+            ['h1', '1', 'a1', 'step', 'Approve', '', text, 'user', 'time'],
+            ['h2', '1', 'a1', 'step', 'Retake', '', None, 'user', 'time'],
+        ]
+        with patch('cgtwq.message.Message.load',
+                   wraps=cgtwq.Message.load) as load:
+            result = module.get_history(cgtwq.Filter('#task_id', '1'))
+            self.assertEqual(load.call_count, 0)
+            self.assertEqual([i.id for i in result], ['h1', 'h2'])
+            self.assertIsInstance(result[0], cgtwq.model.HistoryInfo)
+            self.assertEqual(result[0][6], text)
+            message = result[0].text
+            self.assertIs(result[0].text, message)
+            self.assertEqual(load.call_count, 1)
+        self.assertIsInstance(message, cgtwq.Message)
+        self.assertEqual(message, 'note')
+        self.assertEqual(message.images[0].max, 'max.jpg')
+        self.assertEqual(result[1].text, '')
+
+    def test_iter_history(self):
+        module = self.module
+        base = time.mktime((2018, 1, 1, 0, 0, 0, 0, 0, -1))
+        history = [
+            ['h{}'.format(i), '1', 'a1', 'step', 'Approve', '', '', 'user',
+             time.strftime('%Y-%m-%d %H:%M:%S',
+                           time.localtime(base + i * 60))]
+            for i in range(10)
+        ]
+        # Same second records can not be split.
+        history.append(['h10', '2'] + history[9][2:])
+
+        def _side_effect(*args, **kwargs):
+            filters = [i for i in kwargs['filter_array'] if i != 'and']
+            ret = history
+            for key, operator, value in filters:
+                index = {'time': 8, '#task_id': 1}[key]
+                ret = [i for i in ret
+                       if {'>=': i[index] >= value,
+                           '<': i[index] < value,
+                           '=': i[index] == value}[operator]]
+            if args[1] == 'count_with_filter':
+                return six.text_type(len(ret))
+            self.assertLessEqual(len(ret), 3)
+            return list(reversed(ret))
+        self.call_method.side_effect = _side_effect
+
+        result = list(module.iter_history(
+            page_size=3, start=base - 3600, end=base + 3600, workers=2))
+        self.assertEqual([i.id for i in result[:9]],
+                         ['h{}'.format(i) for i in range(9)])
+        self.assertEqual(set(i.id for i in result[9:]), set(['h9', 'h10']))
+        self.assertIsInstance(result[0], cgtwq.model.HistoryInfo)
+
+        result = module.iter_history(cgtwq.Filter('#task_id', '2'),
+                                     start=base)
+        self.assertEqual([i.id for i in result], ['h10'])
+
+        # Filter list has no grouping,
+        # `or` would match records outside the time window.
+        self.call_method.reset_mock()
+        self.assertRaises(
+            ValueError, module.iter_history,
+            cgtwq.Filter('#task_id', '1') | cgtwq.Filter('#task_id', '2'))
+        self.call_method.assert_not_called()
+
     @patch('cgtwq.database.Module.filter')
     @patch('cgtwq.database.Module.select')
     def test_getitem(self, select, filter_):
@@ -0,0 +1,162 @@
+# -*- coding=UTF-8 -*-
+"""Test module `cgtwq.download` with a local http server.  """
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import shutil
+import tempfile
+import threading
+import time
+from unittest import TestCase, main
+
+import requests
+import six
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from six.moves.socketserver import ThreadingMixIn
+
+from cgtwq import download
+from cgtwq.model import ImageInfo
+
+if six.PY3:
+    from unittest.mock import patch  # pylint: disable=import-error,no-name-in-module
+else:
+    from mock import patch  # pylint: disable=import-error,no-name-in-module
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    files = {}
+    requests = []
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        self.requests.append(self.path)
+        if self.path not in self.files:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = self.files[self.path]
+        etag = '"{}"'.format(hash(body))
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class DownloadTestCase(TestCase):
+    def setUp(self):
+        self.server = _Server(('127.0.0.1', 0), _Handler)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.ip = '127.0.0.1:{}'.format(self.server.server_address[1])
+
+        _Handler.files = {'/a.jpg': b'a' * 100,
+                          '/b.jpg': b'b' * 100,
+                          '/c.jpg': b'c' * 100}
+        _Handler.requests = []
+        self.tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tempdir)
+        self.cache = download.DownloadCache(self.tempdir, max_age=0)
+
+    def _read(self, filename):
+        # pylint: disable=no-self-use
+        with open(filename, 'rb') as f:
+            return f.read()
+
+    def test_fetch(self):
+        cache = self.cache
+        filename = cache.fetch('/a.jpg', 'token', self.ip)
+        self.assertEqual(self._read(filename), b'a' * 100)
+
+        # Revalidate.
+        self.assertEqual(cache.fetch('a.jpg', 'token', self.ip), filename)
+        self.assertEqual(len(_Handler.requests), 2)
+
+        # Changed.
+        _Handler.files['/a.jpg'] = b'A' * 10
+        self.assertEqual(
+            self._read(cache.fetch('/a.jpg', 'token', self.ip)), b'A' * 10)
+
+        # Not revalidate within max age.
+        cache.max_age = 60
+        cache.fetch('/a.jpg', 'token', self.ip)
+        self.assertEqual(len(_Handler.requests), 3)
+
+        self.assertRaises(requests.HTTPError,
+                          cache.fetch, '/not_exists.jpg', 'token', self.ip)
+        # Key locks are removed after fetch.
+        self.assertEqual(cache._key_locks, {})  # pylint: disable=protected-access
+
+    def test_evict(self):
+        cache = self.cache
+        cache.max_size = 250
+        for i in ('/a.jpg', '/b.jpg'):
+            cache.fetch(i, 'token', self.ip)
+            time.sleep(0.05)
+        # Mark `a` as recently used.
+        cache.fetch('/a.jpg', 'token', self.ip)
+        time.sleep(0.05)
+        cache.fetch('/c.jpg', 'token', self.ip)
+        files = cache.files()
+        self.assertEqual(sum(i[1] for i in files), 200)
+        self.assertEqual(sorted(self._read(i[0])[:1] for i in files),
+                         [b'a', b'c'])
+
+    def test_evict_oversized(self):
+        cache = self.cache
+        cache.max_size = 10
+        filename = cache.fetch('/a.jpg', 'token', self.ip)
+        self.assertEqual(self._read(filename), b'a' * 100)
+        # Evicted by next fetch.
+        cache.fetch('/b.jpg', 'token', self.ip)
+        self.assertEqual([self._read(i[0])[:1] for i in cache.files()],
+                         [b'b'])
+
+        # Batch larger than `max_size`.
+        cache.max_size = 150
+        result = cache.fetch_many(['/a.jpg', '/b.jpg', '/c.jpg'],
+                                  'token', self.ip)
+        self.assertEqual(len(result.results), 3)
+        for key, filename in result.results.items():
+            self.assertEqual(self._read(filename), _Handler.files[key])
+        self.assertEqual(cache._key_locks, {})  # pylint: disable=protected-access
+
+    def test_download_images(self):
+        images = [ImageInfo('/a.jpg', '/b.jpg'),
+                  ImageInfo('/c.jpg', '/b.jpg'),
+                  ImageInfo('/not_exists.jpg', '/b.jpg')]
+        last_cache = download.CACHE
+        self.addCleanup(setattr, download, 'CACHE', last_cache)
+        download.CACHE = self.cache
+        self.cache.max_age = 60
+        with patch('cgtwq.server.setting.SERVER_IP', self.ip):
+            result = download.download_images(images)
+            self.assertEqual(set(result.results), set(images[:2]))
+            self.assertEqual(list(result.errors), [images[2]])
+            self.assertEqual(self._read(result.results[images[1]]), b'c' * 100)
+
+            result = download.download_images(images, 'min')
+        self.assertEqual(len(result.results), 3)
+        self.assertEqual(sorted(_Handler.requests),
+                         ['/a.jpg', '/b.jpg', '/c.jpg', '/not_exists.jpg'])
+
+
+if __name__ == '__main__':
+    main()
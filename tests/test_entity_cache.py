@@ -0,0 +1,167 @@
+# -*- coding=UTF-8 -*-
+"""Test module `cgtwq.entity_cache`.  """
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import os
+import shutil
+import threading
+from tempfile import mkdtemp
+from unittest import TestCase, main
+
+import six
+
+import cgtwq
+from cgtwq import entity_cache
+
+if six.PY3:
+    from unittest.mock import patch  # pylint: disable=import-error,no-name-in-module
+else:
+    from mock import patch  # pylint: disable=import-error,no-name-in-module
+
+
+def _fake_server(*args, **kwargs):
+    if args[1] == 'get_with_filter':
+        return [['1'], ['2']]
+    if args[1] == 'get_in_id':
+        return [[i] + ['{}:{}'.format(i, j) for j in kwargs['sign_array'][1:]]
+                for i in kwargs['id_array']]
+    return True
+
+
+class EntityCacheTestCase(TestCase):
+    def setUp(self):
+        patcher = patch('cgtwq.server.call', side_effect=_fake_server)
+        self.addCleanup(patcher.stop)
+        self.call_method = patcher.start()
+
+        tempdir = mkdtemp()
+        self.addCleanup(shutil.rmtree, tempdir)
+        self.path = os.path.join(tempdir, 'cache', 'entity.sqlite')
+        self.addCleanup(entity_cache.disable)
+        self.cache = entity_cache.enable(self.path, max_age=60)
+        self.module = cgtwq.Database('dummy_db')['shot']
+
+    def test_get_fields(self):
+        select = self.module.select('1', '2')
+        result = select.get_fields('id', 'artist')
+        self.assertEqual(result, [['1', '1:task.artist'],
+                                  ['2', '2:task.artist']])
+        self.assertEqual(select.get_fields('id', 'artist'), result)
+        self.assertEqual(self.call_method.call_count, 1)
+
+        # Only missing item and field fetched.
+        result = self.module.select('2', '3').get_fields('artist')
+        self.assertEqual(result, [['2:task.artist'], ['3:task.artist']])
+        self.call_method.assert_called_with(
+            'c_orm', 'get_in_id',
+            db='dummy_db', id_array=('3',),
+            module='shot',
+            module_type='task',
+            order_sign_array=['task.id', 'task.artist'],
+            sign_array=['task.id', 'task.artist'],
+            token=select.token)
+        select.get_fields('status')
+        self.assertEqual(self.call_method.call_count, 3)
+
+        # Shared with other instance.
+        entity_cache.enable(self.path, max_age=60)
+        select.get_fields('id', 'artist')
+        self.assertEqual(self.call_method.call_count, 3)
+
+        # Staleness.
+        entity_cache.enable(self.path, max_age=-1)
+        select.get_fields('id', 'artist')
+        self.assertEqual(self.call_method.call_count, 4)
+
+    def test_order(self):
+        artists = {'1': 'b', '2': 'c', '3': 'a'}
+
+        def _server(*args, **kwargs):
+            # pylint: disable=unused-argument
+            # Server sort by `order_sign_array`, each item once.
+            index = kwargs['sign_array'].index
+            order = [index(i) for i in kwargs['order_sign_array']]
+            rows = [[{'task.id': i, 'task.artist': artists[i]}[j]
+                     for j in kwargs['sign_array']]
+                    for i in set(kwargs['id_array'])]
+            return sorted(rows, key=lambda row: [row[i] for i in order])
+        self.call_method.side_effect = _server
+        select = self.module.select('2', '1', '2', '3')
+        expected = [['a', '3'], ['b', '1'], ['c', '2']]
+        self.module.select('1').get_fields('artist', 'id')
+        self.assertEqual(select.get_fields('artist', 'id'), expected)
+        # All from cache.
+        self.assertEqual(select.get_fields('artist', 'id'), expected)
+        self.assertEqual(self.call_method.call_count, 2)
+        entity_cache.disable()
+        self.assertEqual(select.get_fields('artist', 'id'), expected)
+
+    def test_invalidate(self):
+        select = self.module.select('1', '2')
+        select.get_fields('artist')
+        self.module.select('2').set_fields(artist='Yuri')
+        select.get_fields('artist')
+        self.call_method.assert_called_with(
+            'c_orm', 'get_in_id',
+            db='dummy_db', id_array=('2',),
+            module='shot',
+            module_type='task',
+            order_sign_array=['task.id', 'task.artist'],
+            sign_array=['task.id', 'task.artist'],
+            token=select.token)
+
+    def test_concurrent_write(self):
+        state = {'artist': 'old', 'ids': ['1']}
+        started = threading.Event()
+        release = threading.Event()
+
+        def _server(*args, **kwargs):
+            if args[1] == 'set_in_id':
+                state['artist'] = kwargs['sign_data_array']['task.artist']
+                state['ids'] = ['1', '2']
+                return True
+            if args[1] == 'get_with_filter':
+                ret = [[i] for i in state['ids']]
+            else:
+                ret = [[i, state['artist']] for i in kwargs['id_array']]
+            if not started.is_set():
+                # Respond with data read before the write.
+                started.set()
+                release.wait(10)
+            return ret
+        self.call_method.side_effect = _server
+        select = self.module.select('1')
+        filters = cgtwq.Filter('artist', 'new')
+
+        def _race(func):
+            # Read started before the write, finished after it.
+            started.clear()
+            release.clear()
+            thread = threading.Thread(target=func)
+            thread.start()
+            started.wait(10)
+            select.set_fields(artist='new')
+            release.set()
+            thread.join()
+            # Other process sharing the file.
+            entity_cache.enable(self.path, max_age=60)
+
+        _race(lambda: select.get_fields('artist'))
+        self.assertEqual(select.get_fields('artist'), [['new']])
+        _race(lambda: self.module.filter(filters))
+        self.assertEqual(self.module.filter(filters), ('1', '2'))
+
+    def test_filter(self):
+        filters = cgtwq.Filter('artist', 'Yuri')
+        self.assertEqual(self.module.filter(filters), ('1', '2'))
+        self.assertEqual(self.module.filter(filters), ('1', '2'))
+        self.assertEqual(self.call_method.call_count, 1)
+        self.module.select('3').delete()
+        self.module.filter(filters)
+        self.assertEqual(self.call_method.call_count, 3)
+
+
+if __name__ == '__main__':
+    main()
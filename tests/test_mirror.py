@@ -0,0 +1,131 @@
+# -*- coding=UTF-8 -*-
+"""Test module `cgtwq.mirror`. with a mocked server.  """
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+from unittest import TestCase, main
+
+import six
+
+import cgtwq
+
+if six.PY3:
+    from unittest.mock import patch  # pylint: disable=import-error,no-name-in-module
+else:
+    from mock import patch  # pylint: disable=import-error,no-name-in-module
+
+
+def _history(id_, task_id, time):
+    return [id_, task_id, 'account', 'step', 'Approve', '', '', 'user', time]
+
+
+class FakeServer(object):
+    """Server with in-memory tasks and history.  """
+
+    def __init__(self):
+        self.tasks = {'1': 'Wait', '2': 'Wait'}
+        self.history = []
+
+    def __call__(self, *args, **kwargs):
+        if args[0] == 'c_history':
+            watermark = kwargs['filter_array'][0][2]
+            ret = [i for i in self.history if i[-1] >= watermark]
+            if args[1] == 'count_with_filter':
+                return six.text_type(len(ret))
+            return ret
+        assert args[:2] == ('c_orm', 'get_with_filter'), args
+        id_filter = kwargs['sign_filter_array'][0]
+        id_list = (sorted(self.tasks) if id_filter[1] == 'has'
+                   else id_filter[2])
+        return [[i, self.tasks[i]] for i in id_list if i in self.tasks]
+
+
+class ModuleMirrorTestCase(TestCase):
+    def setUp(self):
+        self.server = FakeServer()
+        patcher = patch('cgtwq.server.call', side_effect=self.server)
+        self.addCleanup(patcher.stop)
+        self.call_method = patcher.start()
+        module = cgtwq.Database('dummy_db')['shot']
+        self.mirror = cgtwq.ModuleMirror(module, ['status'])
+
+    def test_update(self):
+        mirror = self.mirror
+        self.assertEqual(mirror.update(), set(['1', '2']))
+        self.assertEqual(mirror.get('1'), ['1', 'Wait'])
+        self.assertEqual(mirror.fields, ['task.id', 'task.status'])
+
+        # No change.
+        self.assertEqual(mirror.update(), set())
+
+        # Changed and deleted.
+        self.server.tasks['1'] = 'Approve'
+        del self.server.tasks['2']
+        self.server.history.append(_history('h1', '1', '2099-01-01 00:00:00'))
+        self.server.history.append(_history('h2', '2', '2099-01-01 00:00:00'))
+        self.assertEqual(mirror.update(), set(['1', '2']))
+        self.assertEqual(mirror.get('1'), ['1', 'Approve'])
+        self.assertNotIn('2', mirror)
+        self.assertEqual(mirror.watermark, '2099-01-01 00:00:00')
+
+        # Records at watermark time are not processed twice,
+        # and history not fetched when count not changed.
+        self.call_method.reset_mock()
+        self.assertEqual(mirror.update(), set())
+        self.call_method.assert_called_once()
+        self.assertEqual(self.call_method.call_args[0][1], 'count_with_filter')
+
+        self.server.history.append(_history('h3', '1', '2099-01-01 00:00:00'))
+        self.server.tasks['1'] = 'Retake'
+        self.assertEqual(mirror.update(), set(['1']))
+        self.assertEqual(mirror.to_result_set(), [['1', 'Retake']])
+
+    def test_poll(self):
+        mirror = self.mirror
+        self.assertEqual(mirror.poll(), cgtwq.mirror.MirrorDiff(
+            {'1': ['1', 'Wait'], '2': ['2', 'Wait']}, {}, {}))
+
+        self.server.tasks['1'] = 'Approve'
+        self.server.tasks['3'] = 'Wait'
+        del self.server.tasks['2']
+        for i in '123':
+            self.server.history.append(
+                _history('h' + i, i, '2099-01-01 00:00:00'))
+        self.assertEqual(mirror.poll(), cgtwq.mirror.MirrorDiff(
+            {'3': ['3', 'Wait']},
+            {'2': ['2', 'Wait']},
+            {'1': (['1', 'Wait'], ['1', 'Approve'])}))
+
+    def test_or_filters(self):
+        module = self.mirror.module
+        filters = ((cgtwq.Field('status') == 'Wait')
+                   | (cgtwq.Field('status') == 'Retake'))
+        self.assertRaises(ValueError, cgtwq.ModuleMirror,
+                          module, ['status'], filters)
+        cgtwq.ModuleMirror(module, ['status'],
+                           (cgtwq.Field('status') == 'Wait')
+                           & (cgtwq.Field('artist') == 'Yuri'))
+
+    @patch('cgtwq.mirror.time.sleep')
+    def test_watch(self, sleep):
+        watcher = self.mirror.module.watch(
+            cgtwq.Field('status') == 'Wait', 'status',
+            interval=1, max_interval=5)
+        diff = next(watcher)
+        self.assertEqual(set(diff.added), set(['1', '2']))
+
+        def _change_on_fourth_sleep(seconds):
+            # pylint: disable=unused-argument
+            if sleep.call_count == 4:
+                self.server.tasks['2'] = 'Approve'
+                self.server.history.append(
+                    _history('h1', '2', '2099-01-01 00:00:00'))
+        sleep.side_effect = _change_on_fourth_sleep
+        diff = next(watcher)
+        self.assertEqual(diff.changed, {'2': (['2', 'Wait'], ['2', 'Approve'])})
+        self.assertEqual([i[0][0] for i in sleep.call_args_list], [1, 2, 4, 5])
+
+
+if __name__ == '__main__':
+    main()
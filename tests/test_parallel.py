@@ -0,0 +1,46 @@
+# -*- coding=UTF-8 -*-
+"""Test module `cgtwq.parallel`.  """
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import pytest
+
+from cgtwq import parallel
+
+
+def test_run():
+    assert parallel.run(lambda x: x * 2, range(20), workers=4) == [
+        i * 2 for i in range(20)]
+    assert parallel.run(lambda x: x, []) == []
+
+    def _raise(value):
+        raise ValueError(value)
+
+    with pytest.raises(ValueError):
+        parallel.run(_raise, range(3))
+
+
+def test_settle():
+    def _func(value):
+        if value % 3 == 0:
+            raise ValueError(value)
+        return value * 2
+
+    result = parallel.settle(_func, range(10), workers=4)
+    assert result.results == {i: i * 2 for i in range(10) if i % 3}
+    assert sorted(result.errors) == [0, 3, 6, 9]
+    assert all(isinstance(i, ValueError) for i in result.errors.values())
+
+
+def test_chunk_size_tuner():
+    tuner = parallel.ChunkSizeTuner(size=1000, target_time=1.0,
+                                    min_size=100, max_size=5000)
+    tuner.feedback(1000, 4.0)
+    assert tuner.size == 625
+    for _ in range(10):
+        tuner.feedback(1000, 100.0)
+    assert tuner.size == 100
+    for _ in range(20):
+        tuner.feedback(1000, 0.01)
+    assert tuner.size == 5000
@@ -0,0 +1,70 @@
+# -*- coding=UTF-8 -*-
+"""Test module `cgtwq.resultset`.  """
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import pytest
+
+import cgtwq
+
+
+@pytest.fixture(name='result')
+def _result():
+    rows = [['2', 'dog', 'bone'],
+            ['1', 'monkey', 'banana'],
+            ['3', 'dog', 'ball']]
+    return cgtwq.ResultSet(['task.id', 'task.artist', 'task.task_name'],
+                           (i for i in rows),
+                           cgtwq.Database('dummy_db')['shot'])
+
+
+def test_rows(result):
+    assert len(result) == 3
+    assert result[0] == ['2', 'dog', 'bone']
+    assert result[-1] == ['3', 'dog', 'ball']
+    assert result[1:] == [['1', 'monkey', 'banana'], ['3', 'dog', 'ball']]
+    assert list(result)[1] == ['1', 'monkey', 'banana']
+    assert result == [['2', 'dog', 'bone'],
+                      ['1', 'monkey', 'banana'],
+                      ['3', 'dog', 'ball']]
+    assert result != []
+    code, artist, _ = result[1]
+    assert (code, artist) == ('1', 'monkey')
+    with pytest.raises(IndexError):
+        _ = result[3]
+
+
+def test_list_compatibility(result):
+    rows = result.to_list()
+    assert isinstance(rows, list)
+    assert rows == result
+    rows.sort()
+    assert result[0] == ['2', 'dog', 'bone']
+    assert result + [['4', 'cat', 'fish']] == list(result) + [
+        ['4', 'cat', 'fish']]
+    assert [['0', 'cat', 'fish']] + result == [
+        ['0', 'cat', 'fish']] + list(result)
+    assert cgtwq.codec.loads(cgtwq.codec.dumps({'data': result})) == {
+        'data': list(result)}
+
+
+def test_column(result):
+    assert result.column('artist') == ('dog', 'monkey')
+    assert result.column('artist') is result.column('task.artist')
+    assert result.column('artist', distinct=False) == ('dog', 'monkey', 'dog')
+    with pytest.raises(ValueError):
+        result.column('not_exists')
+
+
+def test_index_by(result):
+    index = result.index_by('id')
+    assert index['1'] == ['1', 'monkey', 'banana']
+    assert result.index_by('id') is index
+    assert result.index_by('artist')['dog'] == ['2', 'dog', 'bone']
+
+
+def test_empty():
+    result = cgtwq.ResultSet([], [[], []], cgtwq.Database('dummy_db')['shot'])
+    assert len(result) == 2
+    assert list(result) == [[], []]
@@ -9,6 +9,7 @@ from unittest import TestCase, main
 import six
 
 import cgtwq
+import cgtwq.parallel
 
 if six.PY3:
     from unittest.mock import patch  # pylint: disable=import-error,no-name-in-module
@@ -145,12 +146,208 @@ class SelectionTestCase(TestCase):
             task_id='1',
             token=select.token)
 
+    def test_iter_fields(self):
+        select = self.select
+        rows = [["1", "monkey"], ["2", "dog"]]
+        with patch('cgtwq.server.iter_call',
+                   return_value=iter(rows)) as iter_call:
+            result = select.iter_fields('id', 'artist')
+            iter_call.assert_called_once_with(
+                'c_orm', 'get_in_id',
+                db='dummy_db', id_array=('1', '2'),
+                module='shot',
+                module_type='task',
+                order_sign_array=['task.id', 'task.artist'],
+                sign_array=['task.id', 'task.artist'],
+                token=select.token)
+            result = cgtwq.ResultSet(['task.id', 'task.artist'],
+                                     result, select.module)
+        self.assertEqual(result, rows)
+        self.assertEqual(result.column('artist'), ('dog', 'monkey'))
+        self.call_method.assert_not_called()
+
+    def test_chunked_call(self):
+        call_method = self.call_method
+        # Server sort by `order_sign_array`.
+        call_method.side_effect = lambda *args, **kwargs: [
+            [i] for i in sorted(kwargs['id_array'])]
+        select = cgtwq.Selection(self.select.module,
+                                 *[six.text_type(i) for i in range(250)])
+        key = ('c_orm', 'get_in_id')
+        tuner = cgtwq.parallel.ChunkSizeTuner(size=100, min_size=100,
+                                              max_size=100)
+        with patch.dict(cgtwq.Selection.chunk_tuners, {key: tuner}):
+            result = select.get_fields('id')
+        self.assertEqual(call_method.call_count, 3)
+        self.assertEqual(
+            sorted(len(i[1]['id_array']) for i in call_method.call_args_list),
+            [50, 100, 100])
+        self.assertEqual(list(result), [[i] for i in sorted(select)])
+
+    def test_chunked_order(self):
+        call_method = self.call_method
+        artists = {six.text_type(i): 'artist{:03d}'.format((i * 37) % 250)
+                   for i in range(250)}
+        artists['7'] = None
+
+        def _side_effect(*args, **kwargs):
+            # pylint: disable=unused-argument
+            # Server sort each chunk by `order_sign_array`.
+            assert kwargs['order_sign_array'] == ['task.artist', 'task.id']
+            return sorted(([artists[i], i] for i in kwargs['id_array']),
+                          key=lambda row: (row[0] is not None, row))
+        call_method.side_effect = _side_effect
+        select = cgtwq.Selection(self.select.module, *sorted(artists))
+        key = ('c_orm', 'get_in_id')
+        tuner = cgtwq.parallel.ChunkSizeTuner(size=100, min_size=100,
+                                              max_size=100)
+        with patch.dict(cgtwq.Selection.chunk_tuners, {key: tuner}):
+            result = select.get_fields('artist', 'id')
+        self.assertEqual(call_method.call_count, 3)
+        self.assertEqual(list(result), _side_effect(
+            order_sign_array=['task.artist', 'task.id'], id_array=select))
+
+        # Order field not in result can not be merged, not chunked.
+        call_method.reset_mock()
+        call_method.side_effect = None
+        call_method.return_value = []
+        with patch.dict(cgtwq.Selection.chunk_tuners, {key: tuner}):
+            select.call('c_orm', 'get_in_id',
+                        sign_array=['task.id'],
+                        order_sign_array=['task.artist'])
+        self.assertEqual(call_method.call_count, 1)
+
+    def test_chunked_write(self):
+        call_method = self.call_method
+        call_method.return_value = True
+        select = cgtwq.Selection(self.select.module,
+                                 *[six.text_type(i) for i in range(250)])
+
+        # Writes are not chunked by default.
+        select['artist'] = 'dog'
+        self.assertEqual(call_method.call_count, 1)
+
+        def _side_effect(*args, **kwargs):
+            if '150' in kwargs['id_array']:
+                raise cgtwq.PermissionError
+            return True
+        call_method.reset_mock()
+        call_method.side_effect = _side_effect
+        key = ('c_orm', 'set_in_id')
+        tuner = cgtwq.parallel.ChunkSizeTuner(size=100, min_size=100,
+                                              max_size=100)
+        with patch.dict(cgtwq.Selection.chunk_tuners, {key: tuner}):
+            with self.assertRaises(cgtwq.PartialWriteError) as ctx:
+                select['artist'] = 'dog'
+        self.assertEqual(call_method.call_count, 3)
+        id_list = tuple(select)
+        self.assertEqual(ctx.exception.failed, id_list[100:200])
+        self.assertEqual(ctx.exception.succeeded,
+                         id_list[:100] + id_list[200:])
+        self.assertEqual(len(ctx.exception.errors), 1)
+        self.assertIsInstance(ctx.exception.errors[0], cgtwq.PermissionError)
+
+    def test_bulk_link(self):
+        call_method = self.call_method
+
+        def _side_effect(*args, **kwargs):
+            if kwargs['id'] == '2':
+                raise cgtwq.PermissionError
+            return ['3']
+        call_method.side_effect = _side_effect
+        result = self.select.link.bulk_get()
+        self.assertEqual(result.results, {'1': ['3']})
+        self.assertEqual(list(result.errors), ['2'])
+        self.assertIsInstance(result.errors['2'], cgtwq.PermissionError)
+
+        call_method.reset_mock()
+        call_method.side_effect = None
+        result = self.select.link.bulk_unlink('3', '4')
+        self.assertEqual(result.results, {'1': 'Testing', '2': 'Testing'})
+        self.assertEqual(result.errors, {})
+        self.assertEqual(
+            sorted(i[1]['id'] for i in call_method.call_args_list), ['1', '2'])
+        for i in call_method.call_args_list:
+            self.assertEqual(i[0], ('c_link', 'remove_link_id'))
+            self.assertEqual(i[1]['link_id_array'], ('3', '4'))
+            # Each request only carries its own item.
+            self.assertEqual(i[1]['id_array'], (i[1]['id'],))
+
+        self.assertRaises(TypeError, self.select.link.bulk_unlink,
+                          '3', worker=2)
+
+    def test_bulk_flow(self):
+        call_method = self.call_method
+
+        def _side_effect(*args, **kwargs):
+            # pylint: disable=unused-argument
+            if kwargs['task_id'] == '2':
+                raise ValueError('work_flow::python_update_flow, '
+                                 'no permission to qc')
+            return True
+        call_method.side_effect = _side_effect
+        image = cgtwq.model.ImageInfo('max.jpg', 'min.jpg', 'a.jpg')
+        with patch('cgtwq.message.server.web.upload_image',
+                   return_value=image) as upload_image:
+            result = self.select.flow.bulk_approve(
+                'leader_status', 'Good', images=['a.jpg'])
+        upload_image.assert_called_once_with(
+            'a.jpg', 'dummy_db', self.select.token)
+        self.assertEqual(result.results, {'1': None})
+        self.assertEqual(list(result.errors), ['2'])
+        self.assertIsInstance(result.errors['2'], cgtwq.PermissionError)
+        self.assertEqual(call_method.call_count, 2)
+        for i in call_method.call_args_list:
+            # Each request only carries its own task.
+            self.assertEqual(i[1]['id_array'], (i[1]['task_id'],))
+            self.assertEqual(i[1]['token'], self.select.token)
+            self.assertEqual(i[1]['status'], 'Approve')
+            self.assertEqual(i[1]['field_sign'], 'task.leader_status')
+            self.assertEqual(
+                cgtwq.Message.load(i[1]['text']).images, [image])
+
     def test_to_entry(self):
 
         self.assertRaises(ValueError, self.select.to_entry)
         result = cgtwq.Database('test')['m'].select('1').to_entry()
         self.assertIsInstance(result, cgtwq.Entry)
 
+    def test_to_entries_prefetch(self):
+        call_method = self.call_method
+        call_method.return_value = [['2', 'dog', 'bone'],
+                                    ['1', 'monkey', 'banana']]
+        entries = self.select.to_entries(prefetch=('artist', 'task_name'))
+        call_method.assert_called_once_with(
+            'c_orm', 'get_in_id',
+            db='dummy_db', id_array=('1', '2'),
+            module='shot',
+            module_type='task',
+            order_sign_array=['task.id', 'task.artist', 'task.task_name'],
+            sign_array=['task.id', 'task.artist', 'task.task_name'],
+            token=self.select.token)
+        self.assertEqual([i[0] for i in entries], ['1', '2'])
+        self.assertEqual(entries[0]['artist'], 'monkey')
+        self.assertEqual(entries[1].get_fields('task_name', 'artist'),
+                         ('bone', 'dog'))
+        call_method.assert_called_once()
+
+        # Fallback for fields not prefetched.
+        call_method.return_value = [['2018-01-01']]
+        self.assertEqual(
+            entries[0].get_fields('artist', 'deadline', 'task_name'),
+            ('monkey', '2018-01-01', 'banana'))
+        self.assertEqual(call_method.call_args[1]['sign_array'],
+                         ['task.deadline'])
+
+        # Prefetched data dropped after change.
+        entries[0]['artist'] = 'cat'
+        call_method.return_value = [['cat']]
+        self.assertEqual(entries[0]['artist'], 'cat')
+        self.assertEqual(entries[1]['artist'], 'dog')
+
+        self.assertEqual(self.select.to_entries()[0].prefetched, {})
+
+
 
 class EntryTestCase(TestCase):
     def setUp(self):
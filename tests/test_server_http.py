@@ -0,0 +1,143 @@
+# -*- coding=UTF-8 -*-
+"""Test module `cgtwq.server.http` with a local http server.  """
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import io
+import json
+import threading
+from unittest import TestCase, main
+
+import pytest
+import six
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+from cgtwq import LoginError, codec
+from cgtwq.server import http, setting
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):  # pylint: disable=invalid-name
+        body = b'{"code": "1", "type": "json", "data": "ok"}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):  # pylint: disable=invalid-name
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        if self.path == '/login':
+            result = {'code': '2', 'type': 'msg', 'data': 'please login!!!'}
+        elif self.path == '/upload':
+            # Echo request body.
+            result = {'code': '1', 'type': 'json',
+                      'data': {'content_type': self.headers['Content-Type'],
+                               'body': body.decode('utf-8')}}
+        else:
+            result = {'code': '1', 'type': 'json',
+                      'data': [[six.text_type(i), '测试'] for i in range(1000)]}
+        body = json.dumps(result, ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+
+class HttpTestCase(TestCase):
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), _Handler)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.ip = '127.0.0.1:{}'.format(self.server.server_address[1])
+
+        last = (setting.POOL_CONNECTIONS, setting.POOL_MAXSIZE,
+                setting.POOL_BLOCK, setting.KEEP_ALIVE)
+        self.addCleanup(http.configure, *last)
+
+    def test_configure(self):
+        http.configure(pool_maxsize=4, pool_block=True)
+        adapter = http.SESSION.get_adapter('http://' + self.ip)
+        self.assertEqual(adapter.poolmanager.connection_pool_kw['maxsize'], 4)
+        self.assertIs(adapter.poolmanager.connection_pool_kw['block'], True)
+        self.assertEqual(setting.POOL_MAXSIZE, 4)
+
+    def test_stats(self):
+        http.configure(keep_alive=True)
+        http.reset_pool_stats()
+        for _ in range(3):
+            self.assertEqual(http.get('', 'token', self.ip), 'ok')
+        self.assertEqual(http.pool_stats(), http.PoolStats(hits=2, misses=1))
+
+        http.configure(keep_alive=False)
+        http.reset_pool_stats()
+        for _ in range(2):
+            http.get('', 'token', self.ip)
+        self.assertEqual(http.pool_stats().misses, 2)
+
+    def test_iter_post(self):
+        self.addCleanup(setattr, setting, 'STREAM_CHUNK_SIZE',
+                        setting.STREAM_CHUNK_SIZE)
+        setting.STREAM_CHUNK_SIZE = 100
+
+        result = http.iter_post('api.php', {}, 'token', self.ip)
+        self.assertEqual(next(result), ['0', '测试'])
+        self.assertEqual(len(list(result)), 999)
+        self.assertEqual(list(http.iter_post('api.php', {}, 'token', self.ip)),
+                         http.post('api.php', {}, 'token', self.ip))
+
+        with pytest.raises(LoginError):
+            list(http.iter_post('login', {}, 'token', self.ip))
+
+    def test_post_file(self):
+        http.reset_upload_stats()
+        content = '镜头'.encode('utf-8') * 100000
+        chunk_size = 1024
+        self.addCleanup(setattr, setting, 'UPLOAD_CHUNK_SIZE',
+                        setting.UPLOAD_CHUNK_SIZE)
+        setting.UPLOAD_CHUNK_SIZE = chunk_size
+        fileobj = io.BytesIO(content)
+        reads = []
+        read = fileobj.read
+
+        def _read(size=-1):
+            ret = read(size)
+            reads.append(len(ret))
+            return ret
+        fileobj.read = _read
+
+        result = http.post_file('upload', {'folder': 'proj'}, 'token',
+                                fileobj, '镜头.png', content_type='image/png',
+                                ip=self.ip)
+        self.assertLessEqual(max(reads), chunk_size)
+        boundary = result['content_type'].split('boundary=')[1]
+        self.assertEqual(
+            result['body'],
+            '--{0}\r\n'
+            'Content-Disposition: form-data; name="data"\r\n\r\n'
+            '{2}\r\n'
+            '--{0}\r\n'
+            'Content-Disposition: form-data; name="file"; filename="镜头.png"\r\n'
+            'Content-Type: image/png\r\n\r\n'
+            '{1}\r\n'
+            '--{0}--\r\n'.format(boundary, content.decode('utf-8'),
+                                 codec.dumps({'folder': 'proj'})))
+        stats = http.upload_stats()
+        self.assertEqual(len(stats), 1)
+        self.assertEqual(stats[0].filename, '镜头.png')
+        self.assertEqual(stats[0].size, len(result['body'].encode('utf-8')))
+        self.assertGreater(stats[0].speed, 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -4,10 +4,22 @@
 from __future__ import (absolute_import, division, print_function,
                         unicode_literals)
 
+import os
+import shutil
+import tempfile
+
+import pytest
+import six
+
 import cgtwq
 import cgtwq.server.web
 import util
 
+if six.PY3:
+    from unittest.mock import patch  # pylint: disable=import-error,no-name-in-module
+else:
+    from mock import patch  # pylint: disable=import-error,no-name-in-module
+
 
 @util.skip_if_not_logged_in
 def test_upload_image():
@@ -17,3 +29,78 @@ def test_upload_image():
                                            'proj_big', cgtwq.server.setting.DEFAULT_TOKEN)
     assert isinstance(result, cgtwq.model.ImageInfo)
     assert result.path == filename
+
+
+@pytest.fixture(name='tempdir')
+def _tempdir():
+    ret = tempfile.mkdtemp()
+    cgtwq.server.web.clear_upload_cache()
+    yield ret
+    cgtwq.server.web.clear_upload_cache()
+    cgtwq.entity_cache.disable()
+    shutil.rmtree(ret)
+
+
+def _write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def test_upload_image_dedup(tempdir):
+    # pylint: disable=protected-access
+    filename_a = _write(os.path.join(tempdir, 'a.png'), b'a')
+    filename_b = _write(os.path.join(tempdir, 'b.png'), b'a')
+    filename_c = _write(os.path.join(tempdir, 'c.png'), b'c')
+    with patch('cgtwq.server.web.post_file',
+               side_effect=lambda *args, **kwargs: {
+                   'max': 'max/' + args[4],
+                   'min': 'min/' + args[4]}) as post:
+        message = cgtwq.Message('test')
+        message.images = [filename_a, filename_b, filename_c, filename_a]
+        message.upload_images('proj', 'token')
+        assert post.call_count == 2
+        # Either `a.png` or `b.png` uploaded first.
+        uploaded = message.images[0].max
+        assert uploaded in ('max/a.png', 'max/b.png')
+        assert [(i.max, i.path) for i in message.images] == [
+            (uploaded, filename_a),
+            (uploaded, filename_b),
+            ('max/c.png', filename_c),
+            (uploaded, filename_a),
+        ]
+        assert not cgtwq.server.web._UPLOAD_KEY_LOCKS
+
+        # Different folder.
+        cgtwq.server.web.upload_image(filename_a, 'proj2', 'token')
+        assert post.call_count == 3
+
+        # On disk cache.
+        cgtwq.entity_cache.enable(os.path.join(tempdir, 'cache.sqlite'))
+        cgtwq.server.web.clear_upload_cache()
+        cgtwq.server.web.upload_image(filename_c, 'proj', 'token')
+        assert post.call_count == 4
+        cgtwq.server.web.clear_upload_cache()
+        result = cgtwq.server.web.upload_image(filename_c, 'proj', 'token')
+        assert post.call_count == 4
+        assert result == cgtwq.model.ImageInfo(
+            'max/c.png', 'min/c.png', filename_c)
+
+
+def test_upload_cache_size(tempdir):
+    # pylint: disable=protected-access
+    filenames = [_write(os.path.join(tempdir, '{}.png'.format(i)),
+                        six.text_type(i).encode('ascii'))
+                 for i in range(3)]
+    with patch('cgtwq.server.web._UPLOADED_MAXSIZE', 2), \
+            patch('cgtwq.server.web.post_file',
+                  return_value={'max': 'max', 'min': 'min'}) as post:
+        for i in filenames + filenames[2:]:
+            cgtwq.server.web.upload_image(i, 'proj', 'token')
+        assert post.call_count == 3
+        assert len(cgtwq.server.web._UPLOADED) == 2
+        # Least recently used one is forgotten.
+        cgtwq.server.web.upload_image(filenames[1], 'proj', 'token')
+        assert post.call_count == 3
+        cgtwq.server.web.upload_image(filenames[0], 'proj', 'token')
+        assert post.call_count == 4
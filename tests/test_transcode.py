@@ -0,0 +1,114 @@
+# -*- coding=UTF-8 -*-
+"""Test module `cgtwq.transcode`.  """
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+import os
+import shutil
+import tempfile
+
+import pytest
+import six
+
+import cgtwq
+import cgtwq.server.web
+from cgtwq import transcode
+
+if six.PY3:
+    from unittest.mock import patch  # pylint: disable=import-error,no-name-in-module
+else:
+    from mock import patch  # pylint: disable=import-error,no-name-in-module
+
+
+def _fake_backend(src, dst, max_size, quality):
+    # pylint: disable=unused-argument
+    with open(src, 'rb') as f:
+        data = f.read()
+    if data == b'broken':
+        raise ValueError('Can not read image.', src)
+    with open(dst, 'wb') as f:
+        f.write(data[:max_size])
+
+
+@pytest.fixture(name='tempdir')
+def _tempdir():
+    ret = tempfile.mkdtemp()
+    cgtwq.server.web.clear_upload_cache()
+    yield ret
+    cgtwq.server.web.clear_upload_cache()
+    transcode.disable()
+    shutil.rmtree(ret)
+
+
+def _write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def test_transcoded(tempdir):
+    transcoder = transcode.Transcoder(max_size=10, backend=_fake_backend)
+    large = _write(os.path.join(tempdir, 'large.png'), b'x' * 100)
+    small = _write(os.path.join(tempdir, 'small.png'), b'x' * 5)
+    broken = _write(os.path.join(tempdir, 'broken.png'), b'broken')
+
+    with transcoder.transcoded(large) as path:
+        assert path != large
+        assert os.path.getsize(path) == 10
+    assert not os.path.exists(path)
+    with transcoder.transcoded(small) as path:
+        assert path == small
+    with transcoder.transcoded(broken) as path:
+        assert path == broken
+    assert transcoder.stats() == (3, 111, 21)
+    assert transcoder.stats().saved == 90
+
+
+def test_alpha_pil(tempdir):
+    image_module = pytest.importorskip('PIL.Image')
+    src = os.path.join(tempdir, 'alpha.png')
+    dst = os.path.join(tempdir, 'alpha.jpg')
+    image_module.new('RGBA', (8, 8), (0, 0, 0, 0)).save(src)
+    transcode._transcode_pil(src, dst, 4, 90)  # pylint: disable=protected-access
+    result = image_module.open(dst)
+    assert result.size == (4, 4)
+    assert all(i > 250 for i in result.getpixel((0, 0)))
+
+
+def test_alpha_qt(tempdir):
+    qtgui = pytest.importorskip('Qt.QtGui')
+    from Qt.QtCore import Qt  # pylint: disable=import-error
+    src = os.path.join(tempdir, 'alpha.png')
+    dst = os.path.join(tempdir, 'alpha.jpg')
+    image = qtgui.QImage(8, 8, qtgui.QImage.Format_ARGB32)
+    image.fill(Qt.transparent)
+    assert image.save(src)
+    transcode._transcode_qt(src, dst, 4, 90)  # pylint: disable=protected-access
+    result = qtgui.QImage(dst)
+    assert (result.width(), result.height()) == (4, 4)
+    color = qtgui.QColor(result.pixel(0, 0))
+    assert min(color.red(), color.green(), color.blue()) > 250
+
+
+def test_no_backend():
+    with patch('importlib.import_module', side_effect=ImportError):
+        with pytest.raises(ImportError):
+            transcode.enable()
+    assert transcode.TRANSCODER is None
+    assert transcode.stats() == (0, 0, 0)
+
+
+def test_upload_image(tempdir):
+    filename = _write(os.path.join(tempdir, 'large.png'), b'x' * 100)
+    transcode.enable(max_size=10, backend=_fake_backend)
+    uploaded = []
+
+    def _post_file(*args, **kwargs):
+        uploaded.append((args[3].read(), args[4], kwargs['content_type']))
+        return {'max': 'max', 'min': 'min'}
+    with patch('cgtwq.server.web.post_file', side_effect=_post_file):
+        result = cgtwq.server.web.upload_image(filename, 'proj', 'token')
+    assert result == cgtwq.model.ImageInfo('max', 'min', filename)
+    assert uploaded == [(b'x' * 10, 'large.jpg', 'image/jpeg')]
+    assert transcode.stats().saved == 90
@@ -0,0 +1,110 @@
+# -*- coding=UTF-8 -*-
+"""Test module `cgtwq.unitofwork`. with a mocked server.  """
+
+from __future__ import (absolute_import, division, print_function,
+                        unicode_literals)
+
+from unittest import TestCase, main
+
+import six
+
+import cgtwq
+from cgtwq import unitofwork
+
+if six.PY3:
+    from unittest.mock import patch  # pylint: disable=import-error,no-name-in-module
+else:
+    from mock import patch  # pylint: disable=import-error,no-name-in-module
+
+
+def test_group_by_payload():
+    assert unitofwork.group_by_payload({
+        '1': {'a': 1, 'b': 2},
+        '2': {'b': 2, 'a': 1},
+        '3': {'a': 2},
+    }) == [({'a': 1, 'b': 2}, ['1', '2']), ({'a': 2}, ['3'])]
+
+
+class UnitOfWorkTestCase(TestCase):
+    def setUp(self):
+        patcher = patch('cgtwq.server.call', return_value=True)
+        self.addCleanup(patcher.stop)
+        self.call_method = patcher.start()
+        self.module = cgtwq.Database('dummy_db')['shot']
+
+    def _writes(self):
+        return sorted(
+            (tuple(sorted(i[1]['sign_data_array'].items())),
+             tuple(sorted(i[1]['id_array'])))
+            for i in self.call_method.call_args_list)
+
+    def test_grouped(self):
+        module = self.module
+        with cgtwq.UnitOfWork() as uow:
+            for i in '123':
+                module.select(i).to_entry()['status'] = 'Approve'
+            module.select('4')['status'] = 'Retake'
+            module.select('4', '5')['artist'] = 'unity'
+            self.assertEqual(len(uow), 5)
+            self.call_method.assert_not_called()
+        self.assertEqual(self._writes(), [
+            ((('task.artist', 'unity'),), ('5',)),
+            ((('task.artist', 'unity'), ('task.status', 'Retake')), ('4',)),
+            ((('task.status', 'Approve'),), ('1', '2', '3')),
+        ])
+        self.assertEqual(len(uow), 0)
+
+        # Skip unchanged value.
+        self.call_method.reset_mock()
+        with uow:
+            module.select('1', '2')['status'] = 'Approve'
+            module.select('5')['artist'] = 'unity'
+        self.call_method.assert_not_called()
+
+        module.select('1')['status'] = 'Approve'
+        self.call_method.assert_called_once()
+
+    def test_prefetched(self):
+        self.call_method.return_value = [['1', 'Wait'], ['2', 'Approve']]
+        entries = self.module.select('1', '2').to_entries(prefetch=['status'])
+        self.call_method.reset_mock()
+        self.call_method.return_value = True
+        with cgtwq.UnitOfWork():
+            for i in entries:
+                i['status'] = 'Approve'
+        self.assertEqual(self._writes(), [
+            ((('task.status', 'Approve'),), ('1',))])
+        self.assertNotIn('task.status', entries[0].prefetched)
+        self.assertEqual(entries[1].prefetched, {'task.status': 'Approve'})
+
+    def test_error(self):
+        module = self.module
+        uow = cgtwq.UnitOfWork()
+        with self.assertRaises(ValueError):
+            with uow:
+                module.select('1')['status'] = 'Approve'
+                raise ValueError
+        self.assertEqual(len(uow), 0)
+        self.call_method.assert_not_called()
+
+        def _side_effect(*args, **kwargs):
+            # pylint: disable=unused-argument
+            if kwargs['id_array'] == ('2',):
+                raise cgtwq.PermissionError
+            return True
+        self.call_method.side_effect = _side_effect
+        with self.assertRaises(cgtwq.PermissionError):
+            with uow:
+                module.select('1')['status'] = 'Approve'
+                module.select('2')['status'] = 'Retake'
+        self.assertEqual(len(uow), 1)
+
+        self.call_method.reset_mock()
+        self.call_method.side_effect = None
+        uow.commit()
+        self.assertEqual(self._writes(), [
+            ((('task.status', 'Retake'),), ('2',))])
+
+
+if __name__ == '__main__':
+    main()